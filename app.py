@@ -4,12 +4,19 @@ import os
 import tempfile
 import pandas as pd
 from dotenv import load_dotenv
+from scripts.workers import WorkerPool
+from scripts.store import TransactionStore
+from scripts.merge import merge_statement
+from scripts.fingerprint import FingerprintIndex
+from scripts.normalize import bank_key, canonical
+from scripts import balances, dates, export, intake, reconcile, recurring
 
 st.set_page_config(page_title="PDF Bank Statement Parser", layout="wide")
 st.title("PDF Bank Statement Parser")
 
 load_dotenv()
 poppler_bin = os.getenv('poppler_bin')
+store_path = os.getenv('store_path', 'transactions.db')
 
 banks = [
     'Canara Bank', 'Axis Bank', 'SBI', 'Yes Bank (MSME)', 'ICICI Bank', 'PNB',
@@ -32,52 +39,271 @@ bank_scripts = {
     'HDFC Bank' : 'scripts.script_hdfc'
 }
 
+@st.cache_resource
+def get_worker_pool():
+    # Parsing runs out of process so a hung or oversized PDF cannot take the server down
+    return WorkerPool(
+        size=int(os.getenv('parser_workers', 2)),
+        timeout=float(os.getenv('parser_timeout', 120)),
+        max_rss_mb=int(os.getenv('parser_max_rss_mb', 2048)),
+    )
+
 def save_uploaded_file(uploadedfile, save_dir):
     file_path = os.path.join(save_dir, uploadedfile.name)
     with open(file_path, "wb") as f:
         f.write(uploadedfile.getbuffer())
     return file_path
 
-uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
+PAGE_SIZES = [50, 100, 250, 500]
 
-if uploaded_file:
+
+def process_upload(uploaded_file, module_name, summary_only):
+    """Everything expensive about one upload, done once and kept in the session"""
+    entry = {'name': uploaded_file.name, 'messages': []}
+    pool = get_worker_pool()
     with tempfile.TemporaryDirectory() as tmpdir:
         pdf_path = save_uploaded_file(uploaded_file, tmpdir)
+        # Triage and the first-page fingerprint open the PDF too, so they run in a worker as well
+        screened = pool.call(intake.screen, pdf_path, store_path)
+        if not screened['ok']:
+            entry['result'] = screened
+            return entry
+        entry['decision'] = decision = screened['value']['decision']
+        if decision['route'] == 'reject':
+            return entry
+
+        entry['seen'] = seen = screened['value']['seen']
+        if seen['exact'] is not None:
+            if seen['exact']['statement_id'] is not None:
+                with TransactionStore(store_path) as store:
+                    entry['txns'] = store.query(statement_id=seen['exact']['statement_id'])
+            return entry
+
+        result = pool.run(
+            module_name, pdf_path, poppler_bin,
+            mode="summary" if summary_only else "full",
+            route=decision['route'],
+            account=True,
+        )
+    entry['result'] = result
+    if not result['ok']:
+        return entry
+    entry['account'] = account = result['account']
+
+    df = result['df']
+    if df is None or df.empty:
+        return entry
+    entry['txns'] = txns = canonical(df)
+    entry['integrity'] = reconcile.check(txns, opening=account['opening_bal'])
+    # Without an account number there is no history to merge into; keep the statement on its own
+    account_no = account['account_no'] or f"unknown:{seen['sha256'][:16]}"
+    with TransactionStore(store_path) as store:
+        entry['merged'] = merged = merge_statement(
+            store, bank_key(module_name), account_no, df, result['metrics'],
+            source=uploaded_file.name,
+            period=(account['period_from'], account['period_to']),
+        )
+        entry['history'] = store.aggregates(account_no, bank_key(module_name))
+    with FingerprintIndex(store_path) as index:
+        entry['near'] = index.confirm(result['signature'], seen['candidates'])
+        index.add(seen['sha256'], seen['signature'], uploaded_file.name, merged['statement_id'],
+                  rows_signature=result['signature'])
+    # Statements that print no running balance are rebuilt from the opening balance
+    entry['daily'] = balances.balance_metrics(txns, opening=account['opening_bal'])
+    entry['recurring'] = recurring.detect(txns)
+    entry['bounces'] = recurring.flag_bounces(txns)
+    return entry
+
+
+def transaction_viewer(txns, key):
+    """Filter and page a statement on the server; only the visible page goes to the browser"""
+    txns = txns.assign(date=dates.parse(txns['date']))
+    col_text, col_side = st.columns([3, 1])
+    text = col_text.text_input("Narration contains", key=f"{key}_text")
+    side = col_side.selectbox("Side", ["All", "Debit", "Credit"], key=f"{key}_side")
+    col_from, col_to, col_min, col_max = st.columns(4)
+    date_from = col_from.date_input("From", value=None, key=f"{key}_from")
+    date_to = col_to.date_input("To", value=None, key=f"{key}_to")
+    min_amount = col_min.number_input("Min amount", value=None, min_value=0.0, key=f"{key}_min")
+    max_amount = col_max.number_input("Max amount", value=None, min_value=0.0, key=f"{key}_max")
+
+    amount = txns['debit'].where(txns['debit'] > 0, txns['credit'])
+    mask = pd.Series(True, index=txns.index)
+    if text:
+        mask &= txns['narration'].str.contains(text, case=False, regex=False, na=False)
+    if side == "Debit":
+        mask &= txns['debit'] > 0
+    elif side == "Credit":
+        mask &= txns['credit'] > 0
+    if date_from is not None:
+        mask &= txns['date'] >= pd.Timestamp(date_from)
+    if date_to is not None:
+        mask &= txns['date'] <= pd.Timestamp(date_to)
+    if min_amount is not None:
+        mask &= amount >= min_amount
+    if max_amount is not None:
+        mask &= amount <= max_amount
+    matched = txns[mask]
+
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+    pages = max(1, -(-len(matched) // page_size))
+    # Filters can shrink the result under the page the user was on
+    page = min(col_page.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page"), pages)
+    start = (page - 1) * page_size
+    col_info.caption(f"{len(matched)} of {len(txns)} transactions, page {page} of {pages}")
+    st.dataframe(matched.iloc[start:start + page_size])
+
+
+def export_buttons(entry, txns, key):
+    """Download the statement in the chosen format; each format is written once per upload"""
+    formats = export.available_formats()
+    col_fmt, col_button = st.columns([1, 3])
+    fmt = col_fmt.selectbox("Export format", formats, format_func=str.upper, key=f"{key}_fmt")
+    exports = entry.setdefault('exports', {})
+    if fmt not in exports:
+        exports[fmt] = export.to_bytes(txns, fmt)
+    ext, mime = export.FORMATS[fmt]
+    stem = os.path.splitext(entry['name'])[0]
+    col_button.download_button(f"Download {fmt.upper()}", exports[fmt], file_name=f"{stem}.{ext}",
+                               mime=mime, key=f"{key}_download")
+
+
+def show_entry(entry):
+    if 'decision' not in entry:
+        result = entry['result']
+        st.error(f"Could not inspect the file ({result['error']}): {result['message']}")
+        return
+    decision = entry['decision']
+    st.caption(
+        f"Route: {decision['route']} ({decision['reason']}), "
+        f"{decision['pages']} pages, decided in {decision['elapsed_ms']} ms"
+    )
+    if decision['route'] == 'reject':
+        st.error(f"File rejected: {decision['reason']}")
+        return
+
+    seen = entry['seen']
+    if seen['exact'] is not None:
+        st.warning(f"This exact file was already processed as `{seen['exact']['source']}`, skipping extraction.")
+        if entry.get('txns') is not None:
+            transaction_viewer(entry['txns'], 'stored')
+            export_buttons(entry, entry['txns'], 'stored')
+        return
+    for match in entry.get('near', []):
+        st.warning(f"Looks like a copy of `{match['source']}` ({match['similarity']:.0%} similar transactions).")
+
+    result = entry['result']
+    if not result['ok']:
+        st.error(f"Parsing failed ({result['error']}): {result['message']}")
+        return
+
+    account = entry['account']
+    st.subheader("Account Details")
+    account_data = {
+        "Account Holder": account['name'],
+        "Account Number": account['account_no'],
+        "IFSC": account['ifsc'],
+        "Statement Period": f"{account['period_from']} - {account['period_to']}" if account['period_from'] else None,
+        "Opening Balance (printed)": account['opening_bal'],
+        "Closing Balance (printed)": account['closing_bal'],
+    }
+    st.table(pd.DataFrame(list(account_data.items()), columns=["Field", "Value"]))
+
+    total_debit, total_credit, opening_bal, closing_bal = result['metrics']
+
+    st.subheader("Extracted Transactions")
+    txns = entry.get('txns')
+    if txns is not None:
+        transaction_viewer(txns, 'parsed')
+        export_buttons(entry, txns, 'parsed')
+        integrity = entry['integrity']
+        if integrity['score'] is not None:
+            st.caption(f"Balance integrity: {integrity['score']:.1%} of {integrity['checked']} rows reconcile")
+            if integrity['broken']:
+                st.warning(f"Running balance breaks at rows {integrity['broken'][:20]}")
+        merged = entry['merged']
+        if not account['account_no']:
+            st.info("Account number not found; this statement is stored on its own, not merged into any history.")
+        st.caption(f"Stored {merged['added']} new transactions, "
+                   f"skipped {merged['duplicates']} already on file")
+        with st.expander("Monthly totals for this account (all statements on file)"):
+            st.dataframe(entry['history'])
+        for seam in merged['seams']:
+            if not seam['ok']:
+                st.warning(f"Balance does not carry over at the {seam['seam']} of this statement "
+                           f"(near {seam['stored_date']}): expected {seam['expected']}, found {seam['found']}")
+    else:
+        st.info("No transactions extracted from the PDF.")
+
+    st.subheader("Summary")
+    metric_data = {
+        "Total Credit": total_credit,
+        "Total Debit": total_debit,
+        "Opening Balance": opening_bal,
+        "Closing Balance": closing_bal,
+    }
+    st.table(pd.DataFrame(list(metric_data.items()), columns=["Metric", "Value"]))
+
+    if txns is None:
+        return
+    daily = entry['daily']
+    if daily['days']:
+        st.subheader("Balance Metrics")
+        balance_data = {
+            "Average Bank Balance (5th/15th/25th)": daily['abb'],
+            "Average Daily Balance": daily['avg_balance'],
+            "Minimum Balance": f"{daily['min_balance']} on {daily['min_balance_date']}",
+            "Negative Balance Days": daily['negative_days'],
+        }
+        st.table(pd.DataFrame(list(balance_data.items()), columns=["Metric", "Value"]))
+        st.dataframe(daily['monthly'])
+
+    series = entry['recurring']
+    if not series.empty:
+        st.subheader("Recurring Payments")
+        st.dataframe(series.drop(columns=['account']))
+    bounces = entry['bounces']
+    if bounces.notna().any():
+        st.warning(f"{int((bounces == 'return').sum())} bounced/returned entries and "
+                   f"{int((bounces == 'charge').sum())} bounce charges found")
+        st.dataframe(txns[bounces.notna()])
+
+
+summary_only = st.checkbox("Metrics only (read the printed statement summary when available)")
+uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
+
+if uploaded_file:
+    module_name = bank_scripts.get(selected_bank)
+    if not module_name:
+        st.warning(f"No script found for {selected_bank}")
+    else:
+        st.markdown(f"**Uploaded File:** `{uploaded_file.name}`")
+        # Widget changes rerun the whole script; parse each upload once and page through the kept result
+        upload_key = (uploaded_file.name, uploaded_file.size, module_name, summary_only)
+        uploads = st.session_state.setdefault('uploads', {})
+        try:
+            if upload_key not in uploads:
+                uploads.clear()
+                with st.spinner("Processing the file..."):
+                    uploads[upload_key] = process_upload(uploaded_file, module_name, summary_only)
+            show_entry(uploads[upload_key])
+        except Exception as e:
+            st.error(f"An error occurred while processing: {e}")
 
-        if not os.path.exists(pdf_path):
-            st.error(f"PDF file not found at {pdf_path}")
-        elif not os.path.isfile(pdf_path):
-            st.error(f"Expected a file but got a directory at {pdf_path}")
-        else:
-            st.markdown(f"**Uploaded File:** `{uploaded_file.name}`")
-            with st.spinner("Processing the file..."):
-                try:
-                    if selected_bank:
-                        module_name = bank_scripts.get(selected_bank)
-                        if module_name:
-                            module = __import__(module_name, fromlist=[''])
-                            result = module.run(pdf_path, poppler_bin)
-                            if result is not None:
-                                df, metrics = result
-                                total_debit, total_credit, opening_bal, closing_bal = metrics
-
-                                st.subheader("Extracted Transactions")
-                                if df is not None and not df.empty:
-                                    st.dataframe(df)
-                                else:
-                                    st.info("No transactions extracted from the PDF.")
-
-                                st.subheader("Summary")
-                                metric_data = {
-                                    "Total Credit": total_credit,
-                                    "Total Debit": total_debit,
-                                    "Opening Balance": opening_bal,
-                                    "Closing Balance": closing_bal,
-                                }
-                                st.table(pd.DataFrame(list(metric_data.items()), columns=["Metric", "Value"]))
-                            else:
-                                st.warning("No data returned from processing script.")
-                        else:
-                            st.warning(f"No script found for {selected_bank}")
-                except Exception as e:
-                    st.error(f"An error occurred while processing: {e}")
+st.subheader("Search Stored Transactions")
+query = st.text_input("Narration contains (UPI handle, lender, cheque number...)")
+if query:
+    col_bank, col_from, col_to = st.columns(3)
+    bank_filter = col_bank.selectbox("Bank", ["All"] + banks)
+    date_from = col_from.date_input("From", value=None)
+    date_to = col_to.date_input("To", value=None)
+    with TransactionStore(store_path) as store:
+        matches = store.search(
+            query,
+            bank=None if bank_filter == "All" else bank_key(bank_scripts[bank_filter]),
+            start=date_from.isoformat() if date_from else None,
+            end=date_to.isoformat() if date_to else None,
+        )
+    st.caption(f"{len(matches)} matching transactions (first 1000 shown)")
+    st.dataframe(matches)
@@ -0,0 +1,60 @@
+"""Continuation-row coalescing on a synthetic 100k-row find_tables frame
+
+Run from the repository root: python -m benchmarks.bench_coalesce
+"""
+import time
+import numpy as np
+import pandas as pd
+from scripts import coalesce
+
+ROWS = 100_000
+WRAP_RATE = 0.4  # share of transactions whose narration wraps onto a second line
+
+
+def make_frame(rows=ROWS, seed=0):
+    rng = np.random.default_rng(seed)
+    wraps = rng.random(rows) < WRAP_RATE
+    starts = np.ones(rows, dtype=bool)
+    starts[1:] = ~wraps[1:]
+    n_txn = int(starts.sum())
+    dates = pd.date_range('2020-01-01', periods=n_txn, freq='h').strftime('%d/%m/%Y').to_numpy()
+    amount = np.round(rng.random(n_txn) * 5000, 2)
+    idx = np.cumsum(starts) - 1
+    return pd.DataFrame({
+        'date': np.where(starts, dates[idx], ''),
+        'description': np.where(starts, 'UPI/DR/' + idx.astype(str), 'continued ' + idx.astype(str)),
+        'debit': np.where(starts, amount[idx].astype(str), ''),
+        'credit': '',
+        'balance': np.where(starts, (100000 - np.cumsum(amount))[idx].astype(str), ''),
+    }), n_txn
+
+
+def loop_coalesce(df):
+    """The per-row Python loop this replaces, for comparison"""
+    rows = []
+    for _, row in df.iterrows():
+        if rows and not row['date'] and not row['debit'] and not row['credit'] and not row['balance']:
+            rows[-1]['description'] += ' ' + row['description']
+        else:
+            rows.append(row.to_dict())
+    return pd.DataFrame(rows)
+
+
+def timed(fn, df, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+if __name__ == '__main__':
+    df, n_txn = make_frame()
+    out, vec = timed(lambda d: coalesce.rows(d, 'date', ['description'], ['debit', 'credit', 'balance']), df)
+    assert len(out) == n_txn, (len(out), n_txn)
+    ref, loop = timed(loop_coalesce, df, repeat=1)
+    assert (ref['description'].to_numpy() == out['description'].to_numpy()).all()
+    print(f"{len(df)} rows -> {len(out)} transactions")
+    print(f"vectorized: {vec * 1000:.1f} ms")
+    print(f"iterrows:   {loop * 1000:.1f} ms ({loop / vec:.0f}x slower)")
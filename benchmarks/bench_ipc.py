@@ -0,0 +1,59 @@
+"""Worker result hand-off: pickled frame over the pipe vs Arrow in shared memory
+
+Run from the repository root: python -m benchmarks.bench_ipc
+
+The worker side imports this module and calls run() like a bank module,
+so the timings are the pool round trip for a frame shaped like a parsed
+statement (string cells, as find_tables returns them).
+"""
+import time
+import numpy as np
+import pandas as pd
+from scripts.workers import WorkerPool
+
+ROW_COUNTS = (1_000, 100_000, 1_000_000)
+REPEAT = 3
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    amount = np.round(rng.random(rows) * 5000, 2)
+    return pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=rows, freq='min').strftime('%d/%m/%Y'),
+        'description': 'UPI/DR/' + pd.Series(np.arange(rows)).astype(str) + '/MERCHANT/YESB/PAYMENT',
+        'debit': np.where(amount > 2500, amount.astype(str), ''),
+        'credit': np.where(amount <= 2500, amount.astype(str), ''),
+        'balance': (100000 - np.cumsum(amount)).round(2).astype(str),
+    })
+
+
+_frames = {}
+
+
+def run(pdf_path, poppler_bin=None, rows=1000):
+    # Built once per worker so repeats time the hand-off, not the frame
+    if rows not in _frames:
+        _frames[rows] = make_frame(rows)
+    return _frames[rows], (0.0, 0.0, 0.0, 0.0)
+
+
+def round_trip(pool, rows):
+    pool.run('benchmarks.bench_ipc', '', rows=rows)  # warm the worker's frame
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = pool.run('benchmarks.bench_ipc', '', rows=rows)
+        best = min(best, time.perf_counter() - start)
+    assert result['ok'] and len(result['df']) == rows, result
+    return best
+
+
+if __name__ == '__main__':
+    with WorkerPool(size=1, shared=False) as piped, WorkerPool(size=1, shared=True) as shared:
+        if not shared.shared:
+            print("pyarrow is not installed; only the pickled hand-off is available")
+        for rows in ROW_COUNTS:
+            pickled = round_trip(piped, rows)
+            mapped = round_trip(shared, rows)
+            print(f"{rows:>9} rows: pickled {pickled * 1000:8.1f} ms, "
+                  f"shared memory {mapped * 1000:8.1f} ms ({pickled / mapped:.1f}x)")
@@ -0,0 +1,48 @@
+"""Narration parsing throughput on a synthetic column of mixed channels
+
+Run from the repository root: python -m benchmarks.bench_narration [rows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scripts.narration import parse
+
+ROWS = 1_000_000
+
+TEMPLATES = [
+    'UPI-{name}-{handle}@okaxis-UTIB0001234-{ref12}-PAYMENT',
+    'BY TRANSFER-UPI/CR/{ref12}/{name}/SBIN/{handle}@oksbi/rent',
+    'UPI/{ref12}/food/{handle}@ybl/HDFC BANK',
+    'NEFT CR-HDFC0000001-{name}-SALARY-N0{ref12}',
+    'IMPS/P2A/{ref12}/{name}/ICICI/X1234/fees',
+    'ACH D- {name} FINANCE LTD-BFL{ref12}',
+    'CHQ DEP {ref6} CLG',
+    'ATM WDL {ref6} MUMBAI',
+    'POS 416021XXXXXX1234 {name}/ 12',
+    'INT.PD:01-04-2024',
+]
+NAMES = ['RAHUL KUMAR', 'PRIYA S', 'ACME PVT LTD', 'BAJAJ', 'SURESH', 'ZOMATO']
+
+
+def make_column(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, len(TEMPLATES), rows)
+    names = rng.integers(0, len(NAMES), rows)
+    refs = rng.integers(10 ** 11, 10 ** 12, rows)
+    return pd.Series([
+        TEMPLATES[k].format(name=NAMES[n], handle=NAMES[n].split()[0].lower(), ref12=r, ref6=r % 10 ** 6)
+        for k, n, r in zip(kinds, names, refs)
+    ])
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    column = make_column(rows)
+    start = time.perf_counter()
+    out = parse(column)
+    elapsed = time.perf_counter() - start
+    print(f"{rows} narrations in {elapsed:.2f} s ({rows / elapsed * 60 / 1e6:.1f} M rows/minute)")
+    print(out['channel'].value_counts().to_string())
+    print(f"counterparty found: {out['counterparty'].notna().mean():.1%}, "
+          f"reference found: {out['reference'].notna().mean():.1%}")
@@ -0,0 +1,74 @@
+import re
+import fitz
+from scripts.ocr import MIN_TEXT_CHARS, ocr_page
+
+DATE_TOKEN = r'\d{1,2}[/\-. ](?:\d{1,2}|[A-Za-z]{3,9})[/\-. ]\d{2,4}'
+AMOUNT_TOKEN = r'(?:rs\.?|inr|₹)?\s*(-?[\d,]+\.\d{1,2})'
+
+PATTERNS = {
+    'name': re.compile(
+        r'(?:account\s*holders?\s*name|customer\s*name|account\s*name|^\s*name)\s*[:\-]?[ \t]*\n?[ \t]*'
+        r'((?:m/s\.?|mr\.?|mrs\.?|ms\.?)?[ \t]*[A-Za-z][A-Za-z .&]+)',
+        re.IGNORECASE | re.MULTILINE),
+    'account_no': re.compile(
+        r'(?:account\s*(?:number|no\.?)|a/c\s*(?:number|no\.?))\s*[:\-]?\s*(\d[\d ]{5,}\d)',
+        re.IGNORECASE),
+    'ifsc': re.compile(r'\b([A-Z]{4}0[A-Z0-9]{6})\b'),
+    'period': re.compile(
+        r'(?:from|period)\s*[:\-]?\s*(' + DATE_TOKEN + r')\s*(?:to|-)\s*[:\-]?\s*(' + DATE_TOKEN + r')',
+        re.IGNORECASE),
+    'opening_bal': re.compile(r'opening\s*bal(?:ance)?\s*[:\-]?\s*' + AMOUNT_TOKEN, re.IGNORECASE),
+    'closing_bal': re.compile(r'closing\s*bal(?:ance)?\s*[:\-]?\s*' + AMOUNT_TOKEN, re.IGNORECASE),
+}
+
+FIELDS = ('name', 'account_no', 'ifsc', 'period_from', 'period_to', 'opening_bal', 'closing_bal')
+
+
+def table_text(page):
+    """Flatten first-page table cells into 'label: value' lines"""
+    lines = []
+    for table in page.find_tables().tables:
+        for row in table.extract():
+            cells = [str(c).replace('\n', ' ').strip() for c in row if c]
+            for label, value in zip(cells, cells[1:]):
+                lines.append(f"{label}: {value}")
+    return "\n".join(lines)
+
+
+def parse_account_info(text):
+    info = dict.fromkeys(FIELDS)
+    for key, pattern in PATTERNS.items():
+        match = pattern.search(text)
+        if not match:
+            continue
+        if key == 'period':
+            info['period_from'], info['period_to'] = match.group(1).strip(), match.group(2).strip()
+        elif key in ('opening_bal', 'closing_bal'):
+            info[key] = float(match.group(1).replace(',', ''))
+        elif key == 'account_no':
+            info[key] = match.group(1).replace(' ', '')
+        else:
+            info[key] = match.group(1).strip()
+    return info
+
+
+def extract_account_info(pdf_path):
+    """Read holder name, account number, IFSC, period and balances from the first page"""
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc.load_page(0)
+        text = page.get_text()
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            text = ocr_page(page)
+            return parse_account_info(text)
+
+        info = parse_account_info(text)
+        # Table detection is only worth paying for when the plain text missed something
+        if any(info[f] is None for f in FIELDS):
+            from_tables = parse_account_info(table_text(page))
+            for field in FIELDS:
+                if info[field] is None:
+                    info[field] = from_tables[field]
+        return info
+    finally:
+        doc.close()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from scripts import dates
+
+ABB_DAYS = (5, 15, 25)  # the usual average-bank-balance sampling days
+
+
+def daily_balances(txns, opening=None):
+    """End-of-day balance for every calendar day from the first transaction to the last
+
+    Takes a canonical frame (see normalize.canonical) or rows read back from
+    the transaction store, in statement order. The last balance printed on
+    a day is that day's close; days without transactions carry the previous
+    close forward. When no balances were printed they are rebuilt from
+    opening plus the running sum of amounts.
+    """
+    day = dates.parse(txns['date']).dt.normalize()
+    balance = txns['balance'].astype(float)
+    if balance.isna().all() and opening is not None:
+        balance = opening + (txns['credit'] - txns['debit']).astype(float).cumsum()
+    frame = pd.DataFrame({'day': day.to_numpy(), 'balance': balance.to_numpy()}).dropna()
+    if frame.empty:
+        return pd.Series(dtype=float, name='balance')
+    eod = frame.groupby('day', sort=True)['balance'].last()
+    calendar = pd.date_range(eod.index[0], eod.index[-1], freq='D')
+    return eod.reindex(calendar).ffill().rename('balance')
+
+
+def sample_days(daily, days=ABB_DAYS):
+    """The daily series restricted to the given days of each month, clamped to month end"""
+    idx = daily.index
+    wanted = np.zeros(len(idx), dtype=bool)
+    for d in days:
+        wanted |= idx.day == np.minimum(d, idx.days_in_month)
+    return daily[wanted]
+
+
+def monthly(daily, days=ABB_DAYS, od_limit=None):
+    """Per-month minimum, maximum, mean of all days, ABB over days, and negative days"""
+    if daily.empty:
+        return pd.DataFrame(columns=['min', 'max', 'avg', 'abb', 'negative_days'])
+    month = daily.index.to_period('M')
+    out = daily.groupby(month).agg(['min', 'max', 'mean']).rename(columns={'mean': 'avg'})
+    sampled = sample_days(daily, days)
+    out['abb'] = sampled.groupby(sampled.index.to_period('M')).mean()
+    out['negative_days'] = (daily < 0).groupby(month).sum()
+    if od_limit:
+        out['od_utilization'] = (-daily.clip(upper=0) / od_limit).groupby(month).mean()
+    return out
+
+
+def balance_metrics(txns, days=ABB_DAYS, od_limit=None, opening=None):
+    """Credit-policy balance figures over a statement or a merged history
+
+    abb averages the balance on the given days of every month covered;
+    od_limit, when the account is an overdraft, adds the mean share of the
+    limit drawn and the days drawn beyond it.
+    """
+    daily = daily_balances(txns, opening)
+    if daily.empty:
+        return {'days': 0, 'abb': None, 'avg_balance': None, 'min_balance': None,
+                'min_balance_date': None, 'negative_days': 0, 'monthly': monthly(daily, days, od_limit)}
+    sampled = sample_days(daily, days)
+    result = {
+        'days': len(daily),
+        'abb': float(sampled.mean()) if not sampled.empty else None,
+        'avg_balance': float(daily.mean()),
+        'min_balance': float(daily.min()),
+        'min_balance_date': daily.idxmin().date().isoformat(),
+        'negative_days': int((daily < 0).sum()),
+        'monthly': monthly(daily, days, od_limit),
+    }
+    if od_limit:
+        drawn = -daily.clip(upper=0)
+        result['od_utilization'] = float((drawn / od_limit).mean())
+        result['over_limit_days'] = int((drawn > od_limit).sum())
+    return result
@@ -0,0 +1,38 @@
+def row_starts(df, date_col, amount_cols):
+    """True where a row begins a transaction: it has a date or any non-zero amount
+
+    Rows ahead of the first such row are left standing on their own, so
+    nothing before the first transaction is folded away.
+    """
+    starts = df[date_col].astype(str).str.contains(r'\d', regex=True, na=False)
+    for col in amount_cols:
+        # Any non-zero digit; some banks fill missing amounts with 0 or '0'
+        starts |= df[col].astype(str).str.contains(r'[1-9]', regex=True, na=False)
+    starts |= starts.cumsum() == 0
+    return starts
+
+
+def rows(df, date_col, text_cols, amount_cols):
+    """Fold wrapped continuation rows into the transaction above them
+
+    A continuation row has no date and no amount, only more narration. Rows
+    are numbered by a cumulative sum over the row-start mask, the text
+    columns are joined per group and every other column keeps the value of
+    the group's first row. The frame is one sequence across pages, so a
+    narration wrapping onto the next page is joined too.
+    """
+    if df is None or df.empty:
+        return df
+    df = df.reset_index(drop=True)
+    starts = row_starts(df, date_col, amount_cols)
+    if starts.all():
+        return df
+    group = starts.cumsum()
+    out = df[starts.to_numpy()].reset_index(drop=True)
+    for col in text_cols:
+        text = df[col].fillna('').astype(str).str.strip()
+        text = text.mask(text.isin(['nan', 'None']), '')
+        # Prefix non-empty pieces with a space so a plain per-group sum joins them
+        pieces = (' ' + text).where(text != '', '')
+        out[col] = pieces.groupby(group, sort=False).sum().str.strip().to_numpy()
+    return out
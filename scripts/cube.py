@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from scripts import dates, narration
+
+KEYS = ['month', 'channel', 'counterparty']
+MEASURES = ['credit_total', 'debit_total', 'credit_count', 'debit_count', 'cash_deposit', 'cash_withdrawal']
+CASH_CHANNELS = ('ATM', 'CASH')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cube (
+    bank TEXT NOT NULL,
+    account TEXT NOT NULL,
+    month TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    counterparty TEXT NOT NULL,
+    credit_total REAL NOT NULL,
+    debit_total REAL NOT NULL,
+    credit_count INTEGER NOT NULL,
+    debit_count INTEGER NOT NULL,
+    cash_deposit REAL NOT NULL,
+    cash_withdrawal REAL NOT NULL,
+    PRIMARY KEY (account, bank, month, channel, counterparty)
+);
+"""
+
+# Adding a statement's cells onto the stored ones keeps the cube current without a rebuild
+UPSERT = (
+    f"INSERT INTO cube (bank, account, {', '.join(KEYS + MEASURES)}) "
+    f"VALUES ({', '.join('?' * (2 + len(KEYS) + len(MEASURES)))}) "
+    "ON CONFLICT (account, bank, month, channel, counterparty) DO UPDATE SET "
+    + ', '.join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+)
+
+
+def build(txns, parsed=None):
+    """Month x channel x counterparty totals for one batch of canonical rows"""
+    if parsed is None:
+        parsed = narration.parse(txns['narration'], txns['credit'] - txns['debit'])
+    month = dates.parse(txns['date']).dt.strftime('%Y-%m')
+    cash = parsed['channel'].isin(CASH_CHANNELS)
+    frame = pd.DataFrame({
+        'month': month.fillna(''),
+        'channel': parsed['channel'],
+        'counterparty': narration.counterparty_key(txns['narration'], parsed),
+        'credit_total': txns['credit'],
+        'debit_total': txns['debit'],
+        'credit_count': (txns['credit'] > 0).astype(int),
+        'debit_count': (txns['debit'] > 0).astype(int),
+        'cash_deposit': np.where(cash, txns['credit'], 0.0),
+        'cash_withdrawal': np.where(cash, txns['debit'], 0.0),
+    })
+    return frame.groupby(KEYS, sort=False, as_index=False)[MEASURES].sum()
+
+
+def upsert(conn, bank, account, cells):
+    """Fold a batch's cells into the stored cube; run inside the transaction that stored the rows"""
+    values = cells[KEYS + MEASURES].astype(object).itertuples(index=False, name=None)
+    conn.executemany(UPSERT, [(bank, account, *row) for row in values])
+
+
+def rebuild(conn):
+    """Recompute the cube from stored transactions, for stores that predate it"""
+    stored = pd.read_sql_query(
+        "SELECT bank, account, date, narration, debit, credit FROM transactions ORDER BY id", conn)
+    with conn:
+        conn.execute("DELETE FROM cube")
+        for (bank, account), rows in stored.groupby(['bank', 'account'], sort=False):
+            upsert(conn, bank, account, build(rows.reset_index(drop=True)))
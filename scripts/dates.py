@@ -0,0 +1,57 @@
+import re
+import pandas as pd
+
+# Tried in order when a bank does not list its own; inference only for what none of them fit
+DEFAULT_FORMATS = (
+    '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%y', '%d-%m-%y',
+    '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d %b %y', '%Y-%m-%d',
+)
+
+_SEPARATOR = re.compile(r'\s*([/\-.])\s*')
+_SPACES = re.compile(r'\s+')
+
+
+def clean(series):
+    """'01/01/\\n2024' -> '01/01/2024', '01 Jan\\n2024' -> '01 Jan 2024'"""
+    s = series.astype(str).str.replace(_SPACES, ' ', regex=True).str.strip()
+    return s.str.replace(_SEPARATOR, r'\1', regex=True)
+
+
+def parse(series, formats=DEFAULT_FORMATS):
+    """Vectorized date parsing with explicit formats, parsing each distinct string once
+
+    Statements repeat the same date across many rows, so the column is
+    factorized and only its unique values go through the formats, in
+    order, until each one parses. Values no format fits (a time suffix,
+    a layout the bank's list misses) get one day-first parse with pandas'
+    inference; only what that cannot read either becomes NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    codes, uniques = pd.factorize(series)
+    values = clean(pd.Series(uniques, dtype=object))
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(values[todo], format=fmt, errors='coerce')
+    todo = parsed.isna() & values.str.contains(r'\d', regex=True)
+    if todo.any():
+        parsed[todo] = pd.to_datetime(values[todo], format='mixed', dayfirst=True, errors='coerce')
+    out = pd.Series(parsed.to_numpy().take(codes), index=series.index)
+    out[codes < 0] = pd.NaT
+    return out
+
+
+def parse_column(series, formats=DEFAULT_FORMATS):
+    """parse() for a bank's own date column, keeping the printed strings if none of them parse
+
+    calculate_metrics only runs on rows with a date, so a column turned
+    wholly into NaT would silently zero every metric.
+    """
+    parsed = parse(series, formats)
+    if len(series) and parsed.isna().all():
+        print("No dates could be parsed, keeping them as printed.")
+        return series
+    return parsed
@@ -0,0 +1,222 @@
+import io
+import math
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+BATCH_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # one header row short of Excel's sheet limit
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def available_formats():
+    formats = ['csv']
+    if pa is not None:
+        formats += ['parquet', 'arrow']
+    if Workbook is not None:
+        formats.append('xlsx')
+    return formats
+
+
+def batches(df, rows=BATCH_ROWS):
+    """Row slices of one frame; iloc slices share the frame's memory rather than copy it"""
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _as_batches(data):
+    return batches(data) if isinstance(data, pd.DataFrame) else iter(data)
+
+
+def _open(sink, mode):
+    # Paths are opened (and closed) here; file-like sinks such as BytesIO are left open
+    if isinstance(sink, (str, bytes)) or hasattr(sink, '__fspath__'):
+        return open(sink, mode, **({'newline': ''} if 'b' not in mode else {})), True
+    return sink, False
+
+
+def write_csv(data, sink):
+    rows = 0
+    f, owned = _open(sink, 'wb')
+    text = io.TextIOWrapper(f, encoding='utf-8', newline='', write_through=True)
+    try:
+        header = True
+        for batch in _as_batches(data):
+            batch.to_csv(text, index=False, header=header)
+            header = False
+            rows += len(batch)
+    finally:
+        text.detach()
+        if owned:
+            f.close()
+    return rows
+
+
+def _field_type(types):
+    """One Arrow type for a column across batches; text when they cannot agree"""
+    types = [t for t in types if not pa.types.is_null(t)]
+    if not types:
+        return pa.large_string()
+    target = types[0]
+    for t in types[1:]:
+        if t == target:
+            continue
+        try:
+            target = pa.unify_schemas([pa.schema([('f', target)]), pa.schema([('f', t)])],
+                                      promote_options='permissive').field('f').type
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return pa.large_string()
+    return target
+
+
+def target_schema(frames):
+    """Schema every frame is written under: all-None columns become text, clashing types are promoted or become text"""
+    names, types = [], {}
+    for frame in frames:
+        for field in pa.Schema.from_pandas(frame, preserve_index=False):
+            if field.name not in types:
+                names.append(field.name)
+                types[field.name] = []
+            types[field.name].append(field.type)
+    return pa.schema([(name, _field_type(types[name])) for name in names])
+
+
+def _conform(table, schema):
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        if column.type != field.type:
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"Column {field.name!r} is {column.type} here but {field.type} "
+                                 f"in the first batch; pass a list of frames to unify them") from e
+        columns.append(column)
+    extra = set(table.column_names) - set(schema.names)
+    if extra:
+        raise ValueError(f"Columns {sorted(extra)} are missing from the first batch")
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _record_batches(data):
+    """Arrow record batches under one schema
+
+    A list of frames (shard output, one per PDF) is scanned up front so
+    every column gets a type that fits all of them; a stream takes the
+    first batch's types, with all-None columns read as text.
+    """
+    schema = target_schema(data) if isinstance(data, (list, tuple)) else None
+    for batch in _as_batches(data):
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        if schema is None:
+            schema = target_schema([batch])
+        yield from _conform(table, schema).to_batches()
+
+
+def write_parquet(data, sink):
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export")
+    rows, writer = 0, None
+    try:
+        for batch in _record_batches(data):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is None:
+            # No batches: still leave a readable, empty file behind
+            writer = pq.ParquetWriter(sink, pa.schema([]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_arrow(data, sink):
+    """Uncompressed Arrow IPC file: pyarrow.memory_map / polars.read_ipc(memory_map=True) read it without copying"""
+    if pa is None:
+        raise ImportError("pyarrow is required for Arrow export")
+    rows, writer = 0, None
+    try:
+        for batch in _record_batches(data):
+            if writer is None:
+                writer = pa.ipc.new_file(sink, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is None:
+            # No batches: still leave a readable, empty file behind
+            writer = pa.ipc.new_file(sink, pa.schema([]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _cell(value):
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def write_xlsx(data, sink, sheet='Transactions'):
+    """Write-only workbook; rows past Excel's sheet limit continue on a new sheet"""
+    if Workbook is None:
+        raise ImportError("openpyxl is required for Excel export")
+    wb = Workbook(write_only=True)
+    ws, header, rows, on_sheet, sheets = None, None, 0, 0, 0
+    for batch in _as_batches(data):
+        if header is None:
+            header = [str(c) for c in batch.columns]
+        for row in batch.itertuples(index=False, name=None):
+            if ws is None or on_sheet == XLSX_MAX_ROWS:
+                sheets += 1
+                ws = wb.create_sheet(sheet if sheets == 1 else f"{sheet} {sheets}")
+                ws.append(header)
+                on_sheet = 0
+            ws.append([_cell(v) for v in row])
+            on_sheet += 1
+            rows += 1
+    if ws is None:
+        wb.create_sheet(sheet).append(header or [])
+    wb.save(sink)
+    return rows
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'arrow': write_arrow, 'xlsx': write_xlsx}
+
+
+def export(data, fmt, sink):
+    """Stream a frame or an iterable of frames to sink (path or binary file object); returns rows written"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(WRITERS)}")
+    return WRITERS[fmt](data, sink)
+
+
+def to_bytes(data, fmt):
+    buf = io.BytesIO()
+    export(data, fmt, buf)
+    return buf.getvalue()
@@ -0,0 +1,256 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import fitz
+import pandas as pd
+from scripts import ocr, pagecache
+
+# find_tables strategy per triage route; 'text' reads unruled, whitespace-aligned tables.
+# An 'ocr' file's few text pages are read as ruled tables, and so is a file
+# nobody triaged (route None)
+STRATEGIES = {'tables': 'lines', 'text': 'text', 'ocr': 'lines', None: 'lines'}
+
+# Page journals of interrupted extractions, unless checkpoint_dir says otherwise
+CHECKPOINT_DIR = 'checkpoints'
+
+# Any date-looking token; pages without one carry no transaction rows
+ROW_PATTERN = re.compile(r'\d{1,2}[/\-. ](?:\d{1,2}|[A-Za-z]{3,9})[/\-. ]\d{2,4}')
+
+
+def select_pages(doc, start_markers=(), end_markers=()):
+    """Cheap text pre-check deciding which pages are worth running detection on
+
+    Pages before the first start marker (cover pages) and pages without any
+    date are skipped, and scanning stops after the page holding an end marker.
+    Returns ({page_no: text} for text pages, [page_no] for scanned pages).
+    """
+    selected, scanned, skipped = {}, [], {}
+    started = not start_markers
+    for page_no, page in enumerate(doc):
+        text = page.get_text()
+        if len(text.strip()) < ocr.MIN_TEXT_CHARS:
+            scanned.append(page_no)
+            continue
+        flat = re.sub(r'\s+', ' ', text).lower()
+        if not started:
+            if not any(marker in flat for marker in start_markers):
+                skipped[page_no] = text
+                continue
+            started = True
+            # The header row lives here even if no transaction follows it
+            selected[page_no] = text
+        elif ROW_PATTERN.search(flat):
+            selected[page_no] = text
+        if any(marker in flat for marker in end_markers):
+            break
+
+    if not started:
+        # None of the start markers matched, so they do not describe this layout
+        selected = {page_no: text for page_no, text in skipped.items() if ROW_PATTERN.search(text)}
+    return selected, scanned
+
+
+def file_digest(pdf_path):
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def checkpoint_path(checkpoint_dir=None):
+    """The journal directory: the argument, else the checkpoint_dir environment variable, else CHECKPOINT_DIR"""
+    return checkpoint_dir or os.getenv('checkpoint_dir', CHECKPOINT_DIR)
+
+
+class Checkpoint:
+    """Append-only journal of finished pages so an interrupted extraction can resume
+
+    One JSON line per completed page, in a file named after the PDF's digest
+    and the profile (pagecache.profile) the pages were extracted under, so
+    tables and text, or a retry with another route or markers, never resume
+    each other's pages. The journal outlives the extraction: whoever ran the
+    job removes it with clear_checkpoints once the whole job has succeeded.
+    With checkpoint_dir=None nothing is read or written.
+    """
+
+    def __init__(self, checkpoint_dir, pdf_path, profile=''):
+        self.pages = {}
+        self.path = None
+        self._file = None
+        if not checkpoint_dir:
+            return
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        key = hashlib.sha256(profile.encode()).hexdigest()[:16]
+        self.path = os.path.join(checkpoint_dir, f"{file_digest(pdf_path)}-{key}.jsonl")
+        if os.path.exists(self.path):
+            good_bytes = 0
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn last line from a killed worker
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self.pages[entry['page']] = entry['data']
+                    good_bytes += len(line)
+            os.truncate(self.path, good_bytes)
+        self._file = open(self.path, 'a')
+
+    def save(self, page_no, data):
+        self.pages[page_no] = data
+        if self._file is not None:
+            self._file.write(json.dumps({'page': page_no, 'data': data}) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+
+def clear_checkpoints(checkpoint_dir, pdf_path):
+    """Remove every journal kept for this PDF, whatever it was extracted as"""
+    if not checkpoint_dir or not os.path.isdir(checkpoint_dir) or not os.listdir(checkpoint_dir):
+        return
+    for path in glob.glob(os.path.join(checkpoint_dir, f"{file_digest(pdf_path)}-*.jsonl")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def page_tables(page, strategy="lines"):
+    tables = []
+    table_data = page.find_tables(strategy=strategy)
+    for table in table_data.tables:
+        raw_data = table.extract()
+        if raw_data and len(raw_data):
+            tables.append(raw_data)
+    return tables
+
+
+def cache_path(page_cache=None):
+    """The page cache database: the argument, else the page_cache_path environment variable"""
+    return page_cache or os.getenv('page_cache_path')
+
+
+def extract_tables(pdf_path, start_markers=(), end_markers=(), route=None, checkpoint_dir=None,
+                   page_cache=None):
+    """Run find_tables on transaction pages, OCR'ing only the pages without a text layer
+
+    Pages already extracted from any earlier document (same page content,
+    same strategy) come from the page cache instead, whichever bank's
+    markers selected them there.
+    """
+    if route not in STRATEGIES:
+        raise ValueError(f"No extraction strategy for route {route!r}")
+    strategy = STRATEGIES[route]
+    # Markers only pick pages, they do not change a page's rows: cached pages
+    # are keyed without them, the journal (one file's selection) with them
+    table_profile = pagecache.profile('tables', strategy)
+    ocr_profile = pagecache.profile('ocr-tables')
+    checkpoint = Checkpoint(checkpoint_dir, pdf_path,
+                            pagecache.profile('tables', strategy, start_markers, end_markers))
+    cache = pagecache.PageCache(cache_path(page_cache))
+    try:
+        doc = fitz.open(pdf_path)
+        try:
+            selected, scanned = select_pages(doc, start_markers, end_markers)
+            selected = [page_no for page_no in selected if page_no not in checkpoint.pages]
+            scanned = [page_no for page_no in scanned if page_no not in checkpoint.pages]
+            digests = {}
+            if cache.conn is not None:
+                digests = {page_no: pagecache.page_digest(doc, doc.load_page(page_no))
+                           for page_no in selected + scanned}
+            hits = cache.get_many([digests[p] for p in selected if p in digests], table_profile)
+            fresh = {}
+            for page_no in selected:
+                digest = digests.get(page_no)
+                if digest in hits:
+                    checkpoint.save(page_no, hits[digest])
+                    continue
+                checkpoint.save(page_no, page_tables(doc.load_page(page_no), strategy))
+                if digest is not None:
+                    fresh[digest] = checkpoint.pages[page_no]
+            cache.put_many(fresh, table_profile)
+        finally:
+            doc.close()
+
+        hits = cache.get_many([digests[p] for p in scanned if p in digests], ocr_profile)
+        for page_no in scanned:
+            if digests.get(page_no) in hits:
+                checkpoint.save(page_no, hits[digests[page_no]])
+        scanned = [page_no for page_no in scanned if page_no not in checkpoint.pages]
+        if scanned:
+            fresh = {}
+
+            def save_ocr(page_no, words):
+                rows = ocr.words_to_rows(words)
+                checkpoint.save(page_no, [rows] if rows else [])
+                if page_no in digests:
+                    fresh[digests[page_no]] = checkpoint.pages[page_no]
+            try:
+                ocr.ocr_pages(pdf_path, scanned, on_page=save_ocr)
+            finally:
+                cache.put_many(fresh, ocr_profile)
+    finally:
+        checkpoint.close()
+        cache.close()
+
+    pages = checkpoint.pages
+    tables = [pd.DataFrame(rows) for page_no in sorted(pages) for rows in pages[page_no]]
+    if not tables:
+        print("No tables found in the PDF.")
+        return None
+
+    result_df = pd.concat(tables, ignore_index=True)
+    result_df = result_df.dropna(how='all')  # drop empty rows
+    return result_df
+
+
+def extract_text(pdf_path, start_markers=(), end_markers=(), checkpoint_dir=None, page_cache=None):
+    """Extract transaction page text using PyMuPDF, OCR'ing only the pages without a text layer
+
+    Text pages cost nothing to re-read; OCR results are checkpointed and
+    kept in the page cache.
+    """
+    ocr_profile = pagecache.profile('ocr-text')
+    cache = pagecache.PageCache(cache_path(page_cache))
+    try:
+        doc = fitz.open(pdf_path)
+        try:
+            texts, scanned = select_pages(doc, start_markers, end_markers)
+            digests = {}
+            if scanned and cache.conn is not None:
+                digests = {page_no: pagecache.page_digest(doc, doc.load_page(page_no)) for page_no in scanned}
+        finally:
+            doc.close()
+        hits = cache.get_many(digests.values(), ocr_profile)
+        texts.update((page_no, hits[digest]) for page_no, digest in digests.items() if digest in hits)
+        scanned = [page_no for page_no in scanned if page_no not in texts]
+
+        checkpoint = Checkpoint(checkpoint_dir if scanned else None, pdf_path,
+                                pagecache.profile('text', None, start_markers, end_markers))
+        fresh = {}
+
+        def save_ocr(page_no, words):
+            checkpoint.save(page_no, ocr.rows_to_text(ocr.words_to_rows(words)))
+            if page_no in digests:
+                fresh[digests[page_no]] = checkpoint.pages[page_no]
+        try:
+            pending = [page_no for page_no in scanned if page_no not in checkpoint.pages]
+            if pending:
+                ocr.ocr_pages(pdf_path, pending, on_page=save_ocr)
+        finally:
+            checkpoint.close()
+            cache.put_many(fresh, ocr_profile)
+    finally:
+        cache.close()
+    texts.update(checkpoint.pages)
+
+    return "".join(texts[page_no] + "\n" for page_no in sorted(texts))
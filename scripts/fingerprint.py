@@ -0,0 +1,200 @@
+import hashlib
+import re
+import sqlite3
+import time
+import fitz
+import numpy as np
+from scripts import ocr
+from scripts.extraction import file_digest
+
+# Amounts with paise, in reading order, are what survives a re-render or re-scan of a
+# statement: fonts, layout and date formats change, the money does not. The
+# first-page pass only pre-filters; the signature that decides is taken over
+# the parsed rows
+AMOUNT = re.compile(r'(?<![\d.])\d[\d,]*\.\d{2}(?![\d])')
+
+SHINGLE = 3          # consecutive amounts per shingle
+NUM_PERM = 64
+BANDS = 16           # LSH bands of NUM_PERM // BANDS rows each
+THRESHOLD = 0.8      # estimated Jaccard similarity that counts as a near-duplicate
+PREFILTER = 0.5      # first-page similarity that makes a statement a candidate
+MIN_AMOUNTS = 8      # a first page with fewer amounts than this says nothing
+PRIME = 4294967311   # smallest prime above 2**32
+
+_rng = np.random.default_rng(20240401)
+PERM_A = _rng.integers(1, 2 ** 32, NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    sha256 TEXT PRIMARY KEY,
+    source TEXT,
+    statement_id INTEGER,
+    signature BLOB,
+    rows_signature BLOB,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_lookup ON lsh_buckets (band, bucket);
+CREATE TABLE IF NOT EXISTS rows_lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_lsh_lookup ON rows_lsh_buckets (band, bucket);
+"""
+
+
+def page_amounts(text):
+    return [a.replace(',', '') for a in AMOUNT.findall(text)]
+
+
+def first_page_amounts(pdf_path, max_pages=3, use_ocr=False):
+    """Cheap first pass: amounts from the first page that carries transactions
+
+    Scanned pages are skipped unless use_ocr is set, so the pre-filter
+    never runs tesseract in the caller's process.
+    """
+    with fitz.open(pdf_path) as doc:
+        for page in doc.pages(0, min(max_pages, len(doc))):
+            if ocr.has_text_layer(page):
+                text = page.get_text()
+            elif use_ocr and ocr.ocr_available():
+                text = ocr.ocr_page(page)
+            else:
+                continue
+            amounts = page_amounts(text)
+            if len(amounts) >= MIN_AMOUNTS:
+                return amounts
+    return []
+
+
+def minhash(values):
+    """MinHash signature over shingles of consecutive values; None if there are too few"""
+    if len(values) < SHINGLE:
+        return None
+    shingles = {'|'.join(values[i:i + SHINGLE]) for i in range(len(values) - SHINGLE + 1)}
+    x = np.fromiter((int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), 'little')
+                     for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p stays inside uint64 because a, x and b are all below 2**32
+    return ((np.outer(PERM_A, x) + PERM_B[:, None]) % PRIME).min(axis=1)
+
+
+def row_tokens(txns):
+    """One 'date|amount|balance' token per canonical row, in statement order"""
+    day = txns['date'].dt.strftime('%Y-%m-%d').fillna('')
+    amount = (txns['credit'] - txns['debit']).round(2).map('{:.2f}'.format)
+    balance = txns['balance'].round(2).map(lambda b: '' if b != b else f'{b:.2f}')
+    return (day + '|' + amount + '|' + balance).tolist()
+
+
+def rows_signature(txns):
+    """MinHash over runs of consecutive parsed rows
+
+    A statement and a re-render of it share nearly every run; a cumulative
+    statement (Jan-Jun) and an earlier one (Jan-Mar) share only the months
+    they overlap, which keeps them below THRESHOLD.
+    """
+    return minhash(row_tokens(txns))
+
+
+def similarity(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def bands(signature):
+    rows = NUM_PERM // BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes().hex()) for band in range(BANDS)]
+
+
+class FingerprintIndex:
+    """Two-tier duplicate index: exact PDF bytes, then MinHash/LSH over parsed rows
+
+    check() answers the exact tier from the file hash alone, before anything
+    is extracted, and pre-filters candidates from the first page's amounts.
+    Once the statement is parsed (rows_signature is computed in the worker),
+    confirm() finds re-downloaded, re-rendered or re-scanned copies of a
+    known statement.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Indexes created before row signatures existed
+        if 'rows_signature' not in [row[1] for row in self.conn.execute("PRAGMA table_info(fingerprints)")]:
+            self.conn.execute("ALTER TABLE fingerprints ADD COLUMN rows_signature BLOB")
+
+    def exact(self, digest):
+        row = self.conn.execute(
+            "SELECT sha256, source, statement_id FROM fingerprints WHERE sha256 = ?", (digest,)).fetchone()
+        return None if row is None else {'sha256': row[0], 'source': row[1], 'statement_id': row[2]}
+
+    def _similar(self, signature, threshold, buckets, column, include=()):
+        if signature is None:
+            return []
+        candidates = set(include)
+        for band, bucket in bands(signature):
+            candidates.update(row[0] for row in self.conn.execute(
+                f"SELECT sha256 FROM {buckets} WHERE band = ? AND bucket = ?", (band, bucket)))
+        matches = []
+        for digest in candidates:
+            row = self.conn.execute(
+                f"SELECT source, statement_id, {column} FROM fingerprints WHERE sha256 = ?", (digest,)).fetchone()
+            if row is None or row[2] is None:
+                continue
+            score = similarity(signature, np.frombuffer(row[2], dtype=np.uint64))
+            if score >= threshold:
+                matches.append({'sha256': digest, 'source': row[0], 'statement_id': row[1], 'similarity': score})
+        return sorted(matches, key=lambda m: m['similarity'], reverse=True)
+
+    def similar(self, signature, threshold=PREFILTER):
+        """Indexed documents whose first-page signature is close to this one, best first"""
+        return self._similar(signature, threshold, 'lsh_buckets', 'signature')
+
+    def check(self, pdf_path, threshold=PREFILTER):
+        """{'sha256', 'signature', 'exact', 'candidates'}, before anything is extracted
+
+        candidates are statements whose first page looks alike; they are
+        only a pre-filter for confirm(), which decides on the parsed rows.
+        The first-page pass is skipped on an exact hit.
+        """
+        digest = file_digest(pdf_path)
+        found = {'sha256': digest, 'signature': None, 'exact': self.exact(digest), 'candidates': []}
+        if found['exact'] is None:
+            found['signature'] = minhash(first_page_amounts(pdf_path))
+            found['candidates'] = self.similar(found['signature'], threshold)
+        return found
+
+    def confirm(self, rows_signature, candidates=(), threshold=THRESHOLD):
+        """Near-duplicates by parsed rows: LSH hits plus the pre-filter's candidates, best first"""
+        return self._similar(rows_signature, threshold, 'rows_lsh_buckets', 'rows_signature',
+                             include=[c['sha256'] for c in candidates])
+
+    def add(self, digest, signature=None, source=None, statement_id=None, rows_signature=None):
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO fingerprints (sha256, source, statement_id, signature, rows_signature, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, source, statement_id, None if signature is None else signature.tobytes(),
+                 None if rows_signature is None else rows_signature.tobytes(), time.time()))
+            if cur.rowcount != 1:
+                return
+            for buckets, sig in (('lsh_buckets', signature), ('rows_lsh_buckets', rows_signature)):
+                if sig is not None:
+                    self.conn.executemany(
+                        f"INSERT INTO {buckets} (band, bucket, sha256) VALUES (?, ?, ?)",
+                        ((band, bucket, digest) for band, bucket in bands(sig)))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,16 @@
+from scripts.fingerprint import FingerprintIndex
+from scripts.triage import triage
+
+
+def screen(pdf_path, db_path):
+    """Route and duplicate check for an upload, before any parsing; meant for WorkerPool.call
+
+    Returns {'decision': triage(...), 'seen': FingerprintIndex.check(...) or
+    None for a rejected file}. Both open the PDF, so the app runs this in a
+    worker under the pool's deadline and memory cap rather than in-process.
+    """
+    decision = triage(pdf_path)
+    if decision['route'] == 'reject':
+        return {'decision': decision, 'seen': None}
+    with FingerprintIndex(db_path) as index:
+        return {'decision': decision, 'seen': index.check(pdf_path)}
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import time
+import fitz
+
+# Priority lanes: interactive uploads never wait behind a bulk backfill
+INTERACTIVE = 0
+BULK = 1
+
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 30  # doubled after every failed attempt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    pdf_path TEXT NOT NULL,
+    bank_module TEXT NOT NULL,
+    kwargs TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 1,
+    pages INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (pdf_path, bank_module)
+);
+CREATE INDEX IF NOT EXISTS jobs_schedule ON jobs (status, priority, pages, id);
+"""
+
+
+def page_count(pdf_path):
+    try:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    except Exception:
+        return 0
+
+
+class JobQueue:
+    """Durable per-PDF job queue kept in a SQLite file
+
+    Jobs move pending -> running -> done, or back to pending with a backoff
+    after a failure until max_attempts is used up, then to failed. Within a
+    priority lane the smallest statements (by page count) run first.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, pdf_path, bank_module, priority=BULK, max_attempts=MAX_ATTEMPTS, **kwargs):
+        """Add a job unless this PDF is already queued for the same bank; returns True if added"""
+        now = time.time()
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (pdf_path, bank_module, kwargs, priority, pages, max_attempts, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(pdf_path), bank_module, json.dumps(kwargs), priority,
+             page_count(pdf_path), max_attempts, now, now))
+        return cur.rowcount == 1
+
+    def enqueue_dir(self, directory, bank_module, priority=BULK, **kwargs):
+        added = 0
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith('.pdf'):
+                added += self.enqueue(os.path.join(directory, name), bank_module, priority, **kwargs)
+        return added
+
+    def claim(self):
+        """Atomically take the next runnable job, or None when nothing is due"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ? "
+                "ORDER BY priority, pages, id LIMIT 1", (now,)).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row['id']))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = dict(row)
+        job['kwargs'] = json.loads(job['kwargs'])
+        job['attempts'] += 1
+        return job
+
+    def complete(self, job_id, result=None):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', error = NULL, result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(result, default=float), time.time(), job_id))
+
+    def fail(self, job_id, error):
+        now = time.time()
+        row = self.conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row['attempts'] >= row['max_attempts']:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, now, job_id))
+        else:
+            retry_at = now + BACKOFF_SECONDS * 2 ** (row['attempts'] - 1)
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending', error = ?, not_before = ?, updated_at = ? WHERE id = ?",
+                (error, retry_at, now, job_id))
+
+    def recover(self):
+        """Requeue jobs left running by a crashed runner; done jobs are never redone"""
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'running'", (time.time(),))
+        return cur.rowcount
+
+    def counts(self):
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def next_due(self):
+        row = self.conn.execute("SELECT MIN(not_before) AS t FROM jobs WHERE status = 'pending'").fetchone()
+        return row['t']
+
+    def close(self):
+        self.conn.close()
+
+
+def drain(queue, pool, poppler_bin=None, on_result=None):
+    """Run queued jobs through a WorkerPool until none are pending
+
+    Meant for one runner per queue file: jobs still marked running at start
+    are assumed to belong to a runner that crashed and are requeued. Pages
+    are journaled under the pool's checkpoint_dir (or a job's own), so a
+    job retried after a timeout resumes its extraction.
+    """
+    queue.recover()
+    while True:
+        job = queue.claim()
+        if job is None:
+            due = queue.next_due()
+            if due is None:
+                break
+            time.sleep(max(0.0, min(due - time.time(), BACKOFF_SECONDS)))
+            continue
+        result = pool.run(job['bank_module'], job['pdf_path'], poppler_bin, **job['kwargs'])
+        if result['ok']:
+            if on_result is not None:
+                on_result(job, result)
+            metrics = [float(m) for m in result['metrics']] if result['metrics'] is not None else None
+            queue.complete(job['id'], {'metrics': metrics, 'elapsed': result['elapsed']})
+        else:
+            queue.fail(job['id'], f"{result['error']}: {result['message']}")
+    return queue.counts()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from scripts.normalize import canonical, row_hashes
+
+TOLERANCE = 1.0  # rupees of rounding allowed when checking balances across a seam
+
+
+def backfill_hashes(store, account):
+    """Fill row_hash for this account's rows stored before hashes existed"""
+    old = pd.read_sql_query(
+        "SELECT id, statement_id, date, narration, debit, credit, balance FROM transactions "
+        "WHERE account = ? AND row_hash IS NULL ORDER BY statement_id, seq",
+        store.conn, params=[account])
+    if old.empty:
+        return 0
+    old['date'] = pd.to_datetime(old['date'], format='%Y-%m-%d', errors='coerce')
+    hashes = row_hashes(old, groups=old['statement_id'])
+    with store.conn:
+        store.conn.executemany("UPDATE transactions SET row_hash = ? WHERE id = ?",
+                               zip(hashes.tolist(), old['id'].tolist()))
+    return len(old)
+
+
+def stored_hashes(store, account, hashes):
+    """The subset of hashes already held for this account, via the (account, row_hash) index"""
+    store.conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (h INTEGER PRIMARY KEY)")
+    store.conn.execute("DELETE FROM incoming")
+    store.conn.executemany("INSERT OR IGNORE INTO incoming (h) VALUES (?)", ((h,) for h in hashes.tolist()))
+    rows = store.conn.execute(
+        "SELECT DISTINCT row_hash FROM transactions WHERE account = ? AND row_hash IN (SELECT h FROM incoming)",
+        (account,)).fetchall()
+    store.conn.execute("DELETE FROM incoming")
+    store.conn.commit()
+    return {row[0] for row in rows}
+
+
+def neighbour(store, account, date, before):
+    """The stored transaction just before (or after) a date for this account"""
+    if before:
+        sql = ("SELECT date, amount, balance FROM transactions WHERE account = ? AND date < ? "
+               "ORDER BY date DESC, statement_id DESC, seq DESC LIMIT 1")
+    else:
+        sql = ("SELECT date, amount, balance FROM transactions WHERE account = ? AND date > ? "
+               "ORDER BY date, statement_id, seq LIMIT 1")
+    return store.conn.execute(sql, (account, date)).fetchone()
+
+
+def check_seams(store, account, new):
+    """Compare balances where the new rows meet stored history on either side"""
+    seams = []
+    dated = new.dropna(subset=['date'])
+    if dated.empty:
+        return seams
+    first, last = dated.iloc[0], dated.iloc[-1]
+
+    prev = neighbour(store, account, first['date'].strftime('%Y-%m-%d'), before=True)
+    if prev is not None and prev[2] is not None and not np.isnan(first['balance']):
+        expected = prev[2] + first['credit'] - first['debit']
+        seams.append({'seam': 'start', 'stored_date': prev[0], 'expected': round(float(expected), 2),
+                      'found': float(first['balance']), 'ok': bool(abs(expected - first['balance']) <= TOLERANCE)})
+
+    nxt = neighbour(store, account, last['date'].strftime('%Y-%m-%d'), before=False)
+    if nxt is not None and nxt[2] is not None and not np.isnan(last['balance']):
+        expected = last['balance'] + nxt[1]
+        seams.append({'seam': 'end', 'stored_date': nxt[0], 'expected': round(float(expected), 2),
+                      'found': float(nxt[2]), 'ok': bool(abs(expected - nxt[2]) <= TOLERANCE)})
+    return seams
+
+
+def merge_statement(store, bank, account, std_df, metrics=None, source=None, period=(None, None)):
+    """Append only the transactions of a new statement that the account's history lacks
+
+    Rows are matched on their (date, amount, balance, narration) hash, so an
+    overlapping Feb-Apr statement after a Jan-Mar one adds just April. Only
+    the new statement is hashed; history is reached through the hash index.
+    """
+    backfill_hashes(store, account)
+    txns = canonical(std_df)
+    txns['row_hash'] = row_hashes(txns)
+    seen = stored_hashes(store, account, txns['row_hash'])
+    duplicate = txns['row_hash'].isin(seen)
+    new = txns[~duplicate].reset_index(drop=True)
+
+    seams = check_seams(store, account, new)
+    for seam in seams:
+        if not seam['ok']:
+            print(f"Balance break at {seam['seam']} of merged statement near {seam['stored_date']}: "
+                  f"expected {seam['expected']}, found {seam['found']}")
+
+    statement_id = None
+    if not new.empty:
+        statement_id = store.add_transactions(bank, account, new, metrics, source, period)
+    return {'statement_id': statement_id, 'added': len(new), 'duplicates': int(duplicate.sum()), 'seams': seams}
@@ -0,0 +1,142 @@
+import re
+import numpy as np
+import pandas as pd
+
+FIELDS = ['channel', 'direction', 'counterparty', 'counterparty_bank', 'reference']
+
+# 'BY TRANSFER-', 'TO CLG-' and similar wrappers say which way the money moved
+# and hide the real channel prefix behind them
+WRAPPER = re.compile(r'^(?:(?P<wrap>BY|TO)\b[\s:-]*(?:TRANSFER|TRF|INST)?[\s:-]*|MMT/|INB/|MB/)')
+
+# One pass over the first token picks the channel; its rules then run on those rows only
+PREFIX = re.compile(r'^(UPI|NEFT|RTGS|IMPS|NACH|ACH|ECS|CHQ|CHEQUE|CLG|CLEARING|MICR|ATM|ATW|NWD|EAW|'
+                    r'CASH|POS|PCD|ECOM|INT|INTEREST|SAL|SALARY)\b')
+CHANNELS = {
+    'UPI': 'UPI', 'NEFT': 'NEFT', 'RTGS': 'RTGS', 'IMPS': 'IMPS',
+    'NACH': 'NACH', 'ACH': 'NACH', 'ECS': 'NACH',
+    'CHQ': 'CHEQUE', 'CHEQUE': 'CHEQUE', 'CLG': 'CHEQUE', 'CLEARING': 'CHEQUE', 'MICR': 'CHEQUE',
+    'ATM': 'ATM', 'ATW': 'ATM', 'NWD': 'ATM', 'EAW': 'ATM',
+    'CASH': 'CASH', 'POS': 'CARD', 'PCD': 'CARD', 'ECOM': 'CARD',
+    'INT': 'INTEREST', 'INTEREST': 'INTEREST', 'SAL': 'SALARY', 'SALARY': 'SALARY',
+}
+
+IFSC = r'[A-Z]{4}0[A-Z0-9]{6}'
+DIR = r'(?P<direction>DR|CR|D|C)'
+
+# Per channel, tried in order; a later pattern only fills rows an earlier one left open
+RULES = {
+    'UPI': [
+        # UPI-NAME-handle@psp-IFSC-REF-NOTE
+        rf'^UPI-(?P<counterparty>[^-]+)-(?P<handle>[^-\s]+@[^-\s]+)-(?P<counterparty_bank>{IFSC})-(?P<reference>\d{{12}})',
+        # UPI/DR/REF/NAME/BANK/handle@psp/NOTE
+        rf'^UPI/{DIR}/(?P<reference>\d{{12}})/(?P<counterparty>[^/]+)/(?P<counterparty_bank>[^/]+)/(?P<handle>[^/]*@[^/]*)',
+        # UPI/REF/NOTE/handle@psp/BANK
+        r'^UPI/(?P<reference>\d{12})/[^/]*/(?P<handle>[^/]*@[^/]*)/(?P<counterparty_bank>[^/]+)',
+        r'(?P<handle>[\w.\-]+@[A-Z]+).*?(?P<reference>\b\d{12}\b)?',
+        r'(?P<reference>\b\d{12}\b)',
+    ],
+    'NEFT': [
+        # NEFT CR-IFSC-NAME-...-REF
+        rf'^NEFT[\s/-]*{DIR}?[\s/-]+(?P<counterparty_bank>{IFSC})-(?P<counterparty>[^-]+)-(?:.*-)?(?P<reference>[A-Z0-9]{{8,}})$',
+        # NEFT*IFSC*REF*NAME
+        rf'^NEFT\*(?P<counterparty_bank>{IFSC})\*(?P<reference>[A-Z0-9]+)\*(?P<counterparty>[^*]+)',
+        # NEFT/REF/NAME/BANK
+        r'^NEFT/(?P<reference>[A-Z0-9]{8,})/(?P<counterparty>[^/]+)(?:/(?P<counterparty_bank>[^/]+))?',
+        rf'(?P<counterparty_bank>{IFSC})',
+    ],
+    'RTGS': [
+        rf'^RTGS[\s/-]*{DIR}?[\s/-]+(?P<counterparty_bank>{IFSC})-(?P<counterparty>[^-]+)-(?:.*-)?(?P<reference>[A-Z0-9]{{8,}})$',
+        r'^RTGS/(?P<reference>[A-Z0-9]{8,})/(?P<counterparty>[^/]+)(?:/(?P<counterparty_bank>[^/]+))?',
+        rf'(?P<counterparty_bank>{IFSC})',
+    ],
+    'IMPS': [
+        # IMPS/P2A/REF/NAME/BANK/...  and  IMPS-REF-NAME-BANK-...
+        r'^IMPS[/-](?:P2[AP][/-])?(?P<reference>\d{12})[/-](?P<counterparty>[^/-]+)[/-](?P<counterparty_bank>[^/-]+)',
+        r'(?P<reference>\b\d{12}\b)',
+    ],
+    'NACH': [
+        # ACH D- LENDER NAME-MANDATEREF  /  NACH-DR-LENDER-REF
+        rf'^(?:N?ACH|ECS)[\s/-]*{DIR}?[\s/-]+(?P<counterparty>[^-/]+?)\s*[-/]\s*(?P<reference>[A-Z0-9]{{6,}})',
+        rf'^(?:N?ACH|ECS)[\s/-]*{DIR}?[\s/-]+(?P<counterparty>[^-/]+)',
+    ],
+    'CHEQUE': [
+        r'^(?:CHQ|CHEQUE|CLG|CLEARING|MICR)\b[^0-9]*?(?P<direction>DEP|PAID|RET|ISSUED)?\b.*?(?P<reference>\b\d{6}\b)',
+        r'^(?:CHQ|CHEQUE)\s*(?P<direction>DEP|PAID|RET)',
+    ],
+    'CARD': [r'^(?:POS|PCD|ECOM)[\s/-]*(?:[\dX*]{4,}[\s/-]*)?(?P<counterparty>[A-Z][^/\d]*?)\s*(?:/|\d|$)'],
+    'SALARY': [r'^SAL(?:ARY)?[\s/-]*(?:CR[\s/-]*)?(?P<counterparty>[A-Z][^/\d-]*)'],
+}
+COMPILED = {channel: [re.compile(p) for p in patterns] for channel, patterns in RULES.items()}
+
+# Channels that only ever move money one way
+FIXED_DIRECTION = {'ATM': 'debit', 'CARD': 'debit', 'INTEREST': 'credit', 'SALARY': 'credit'}
+DIRECTION_WORDS = {'DR': 'debit', 'D': 'debit', 'PAID': 'debit', 'ISSUED': 'debit', 'TO': 'debit',
+                   'CR': 'credit', 'C': 'credit', 'DEP': 'credit', 'BY': 'credit'}
+
+
+def _blank(s):
+    return s.isna() | (s == '')
+
+
+def parse(narrations, amounts=None):
+    """Split narrations into channel, direction, counterparty, counterparty bank and reference
+
+    Works column-at-a-time: the wrapper and channel prefix are read in one
+    regex pass each, then every channel's rules run only over its own rows.
+    Direction comes from the narration when it says so (DR/CR, DEP, BY/TO),
+    otherwise from the sign of amounts (credit - debit) when given. IFSC
+    codes are reduced to their four-letter bank code.
+    """
+    text = narrations.fillna('').astype(str).str.upper().str.replace(r'\s+', ' ', regex=True).str.strip()
+    out = pd.DataFrame({field: pd.Series(np.nan, index=text.index, dtype=object) for field in FIELDS})
+
+    wrap = text.str.extract(WRAPPER)['wrap']
+    body = text.str.replace(WRAPPER, '', regex=True)
+    out['channel'] = body.str.extract(PREFIX)[0].map(CHANNELS).fillna('OTHER')
+    if (out['channel'] == 'OTHER').any():
+        # Cash desks are written many ways; look a little past the start for them
+        other = out['channel'] == 'OTHER'
+        cash = body[other].str.contains(r'\bCASH\b', regex=True)
+        out.loc[cash[cash].index, 'channel'] = 'CASH'
+
+    handle = pd.Series(np.nan, index=text.index, dtype=object)
+    for channel, patterns in COMPILED.items():
+        rows = out.index[out['channel'] == channel]
+        for pattern in patterns:
+            if rows.empty:
+                break
+            found = body[rows].str.extract(pattern)
+            for field in found.columns:
+                current = handle if field == 'handle' else out[field]
+                fill = (_blank(current[rows]) & found[field].notna() & (found[field] != '')).to_numpy()
+                values = found[field][fill].str.strip().to_numpy()
+                if field == 'handle':
+                    handle.loc[rows[fill]] = values
+                else:
+                    out.loc[rows[fill], field] = values
+            done = out.loc[rows, ['counterparty', 'reference']].notna().all(axis=1)
+            rows = rows[~done.to_numpy()]
+
+    # UPI rows often carry only the handle; its local part is the best name there is
+    no_name = _blank(out['counterparty']) & handle.notna()
+    out.loc[no_name, 'counterparty'] = handle[no_name].str.split('@').str[0]
+    ifsc = out['counterparty_bank'].str.fullmatch(IFSC, na=False)
+    out.loc[ifsc, 'counterparty_bank'] = out.loc[ifsc, 'counterparty_bank'].str[:4]
+
+    direction = out['direction'].map(DIRECTION_WORDS)
+    direction = direction.fillna(wrap.map(DIRECTION_WORDS))
+    direction = direction.fillna(out['channel'].map(FIXED_DIRECTION))
+    if amounts is not None:
+        sign = pd.Series(np.sign(np.asarray(amounts, dtype=float)), index=text.index)
+        direction = direction.fillna(sign.map({1.0: 'credit', -1.0: 'debit'}))
+    out['direction'] = direction
+    return out
+
+
+def counterparty_key(narrations, parsed):
+    """Counterparty name stripped of digits and punctuation, or the narration's first words without one"""
+    name = parsed['counterparty'].fillna('')
+    fallback = narrations.fillna('').astype(str).str.upper().str.replace(r'[^A-Z ]+', ' ', regex=True)
+    fallback = fallback.str.split().str[:3].str.join(' ')
+    key = name.str.upper().str.replace(r'[^A-Z ]+', ' ', regex=True).str.split().str.join(' ')
+    return key.where(key != '', fallback)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from scripts import dates
+
+# Every bank's standardize() names its columns a little differently
+COLUMN_ALIASES = {
+    'date': 'date',
+    'narration': 'narration',
+    'description': 'narration',
+    'particulars': 'narration',
+    'transaction remarks': 'narration',
+    'account description': 'narration',
+    'debit': 'debit',
+    'withdrawal': 'debit',
+    'withdrawals': 'debit',
+    'dr amount': 'debit',
+    'debit amount': 'debit',
+    'credit': 'credit',
+    'deposit': 'credit',
+    'deposits': 'credit',
+    'cr amount': 'credit',
+    'credit amount': 'credit',
+    'balance': 'balance',
+    'closing_balance': 'balance',
+}
+
+CANONICAL_COLUMNS = ['date', 'narration', 'debit', 'credit', 'balance']
+
+
+def to_amount(series):
+    """Vectorized '1,234.50 Cr' -> 1234.5; blanks and junk become NaN"""
+    s = (series.astype(str)
+         .str.replace('\n', '', regex=False)
+         .str.replace(',', '', regex=False)
+         .str.replace(r'[\s\.]*(?:dr|cr)\.?$', '', case=False, regex=True)
+         .str.strip())
+    return pd.to_numeric(s, errors='coerce')
+
+
+def to_balance(series):
+    """Like to_amount, but a trailing Dr marks an overdrawn (negative) balance
+
+    Several banks' standardize() write a bare '0' (or leave a blank) where
+    no balance was printed; those placeholders come back as NaN. A real
+    zero balance is printed with its paise ('0.00') and is kept.
+    """
+    amount = to_amount(series)
+    text = series.astype(str).str.strip()
+    overdrawn = text.str.contains(r'dr\.?$', case=False, regex=True, na=False)
+    placeholder = series.isna() | text.isin(['', '0'])
+    return amount.where(~overdrawn, -amount).mask(placeholder)
+
+
+def canonical(std_df):
+    """Map a bank's standardized frame onto date/narration/debit/credit/balance
+
+    Amounts come back as floats (missing debit/credit as 0, missing balance
+    as NaN, overdrawn balances negative) and date as datetime64; banks that
+    already parsed their dates with their own formats keep them.
+    """
+    out = pd.DataFrame(index=std_df.index)
+    for col in std_df.columns:
+        target = COLUMN_ALIASES.get(str(col).strip().lower())
+        if target and target not in out.columns:
+            out[target] = std_df[col]
+    for col in CANONICAL_COLUMNS:
+        if col not in out.columns:
+            out[col] = np.nan if col in ('debit', 'credit', 'balance') else ''
+
+    out['narration'] = out['narration'].fillna('').astype(str).str.replace('\n', ' ', regex=False).str.strip()
+    out['debit'] = to_amount(out['debit']).fillna(0.0)
+    out['credit'] = to_amount(out['credit']).fillna(0.0)
+    out['balance'] = to_balance(out['balance'])
+    out['date'] = dates.parse(out['date'])
+    return out[CANONICAL_COLUMNS].reset_index(drop=True)
+
+
+def bank_key(module_name):
+    """'scripts.script_sbi' -> 'sbi'"""
+    return module_name.rsplit('.', 1)[-1].replace('script_', '')
+
+
+def row_hashes(txns, groups=None):
+    """64-bit key per transaction over (date, amount, balance, normalized narration)
+
+    Identical rows within one statement (or within each group) are told apart
+    by their occurrence number, so two real same-day payments never collapse
+    into one while the same row seen in two statements still matches.
+    """
+    key = pd.DataFrame({
+        'date': txns['date'].dt.strftime('%Y-%m-%d').fillna(''),
+        'amount': (txns['credit'] - txns['debit']).round(2),
+        'balance': txns['balance'].round(2).fillna(np.inf),
+        'narration': (txns['narration'].fillna('').astype(str).str.upper()
+                      .str.replace(r'[^A-Z0-9]+', '', regex=True)),
+    })
+    grouper = [key[col] for col in key.columns]
+    if groups is not None:
+        grouper.insert(0, pd.Series(np.asarray(groups), index=key.index))
+    key['n'] = key.groupby(grouper, sort=False).cumcount()
+    return pd.util.hash_pandas_object(key, index=False).to_numpy().view('int64')
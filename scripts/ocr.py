@@ -0,0 +1,182 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import fitz
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+
+# Pages with fewer characters than this in their text layer are treated as scanned
+MIN_TEXT_CHARS = 50
+
+# Render so that the page width comes out near this many pixels (~300 DPI on A4)
+TARGET_WIDTH_PX = 2480
+MIN_DPI = 150
+MAX_DPI = 400
+
+# Horizontal gap (in PDF points) that separates two cells on the same line
+CELL_GAP = 12
+
+
+def ocr_available():
+    if pytesseract is None:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def has_text_layer(page, min_chars=MIN_TEXT_CHARS):
+    return len(page.get_text().strip()) >= min_chars
+
+
+def scanned_pages(doc):
+    """Page numbers (0-based) that have no usable text layer"""
+    return [i for i, page in enumerate(doc) if not has_text_layer(page)]
+
+
+def adaptive_dpi(page):
+    width_in = page.rect.width / 72
+    if width_in <= 0:
+        return MIN_DPI
+    return int(min(MAX_DPI, max(MIN_DPI, TARGET_WIDTH_PX / width_in)))
+
+
+def render_page(page, dpi=None):
+    dpi = dpi or adaptive_dpi(page)
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return pix.width, pix.height, pix.samples, 72 / dpi
+
+
+def ocr_image(width, height, samples, scale):
+    """Run tesseract on a grayscale bitmap and return words in PDF point coordinates"""
+    img = Image.frombytes("L", (width, height), samples)
+    data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+    words = []
+    for i, text in enumerate(data['text']):
+        text = text.strip()
+        if not text or float(data['conf'][i]) < 0:
+            continue
+        words.append({
+            'text': text,
+            'x0': data['left'][i] * scale,
+            'y0': data['top'][i] * scale,
+            'x1': (data['left'][i] + data['width'][i]) * scale,
+            'y1': (data['top'][i] + data['height'][i]) * scale,
+        })
+    return words
+
+
+def ocr_page(page, dpi=None):
+    """OCR a single page rendered in memory and return its plain text"""
+    if not ocr_available():
+        print("Tesseract is not available, skipping OCR.")
+        return ""
+    rows = words_to_rows(ocr_image(*render_page(page, dpi)))
+    return "\n".join(" ".join(cell for cell in row if cell) for row in rows)
+
+
+def ocr_pages(pdf_path, page_numbers=None, max_workers=None, max_in_flight=None, on_page=None):
+    """OCR pages without a text layer in a process pool; returns {page_no: words}
+
+    on_page(page_no, words) is called as each page finishes, in completion order.
+    """
+    if not ocr_available():
+        print("Tesseract is not available, skipping OCR.")
+        return {}
+
+    max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+    # Each rendered page is several MB, so never hold more than a few at once
+    max_in_flight = max_in_flight or max_workers * 2
+    results = {}
+
+    def collect(fut, page_no):
+        results[page_no] = fut.result()
+        if on_page is not None:
+            on_page(page_no, results[page_no])
+
+    doc = fitz.open(pdf_path)
+    try:
+        if page_numbers is None:
+            page_numbers = scanned_pages(doc)
+        if not page_numbers:
+            return results
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            for page_no in page_numbers:
+                page = doc.load_page(page_no)
+                if has_text_layer(page):
+                    continue
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        collect(fut, pending.pop(fut))
+                pending[pool.submit(ocr_image, *render_page(page))] = page_no
+            for fut in as_completed(pending):
+                collect(fut, pending[fut])
+    finally:
+        doc.close()
+    return results
+
+
+def _column_anchors(lines):
+    widest = max(lines, key=len)
+    return [cell['x0'] for cell in widest]
+
+
+def _group_lines(words):
+    # Tesseract often puts each table column in its own block, so lines are
+    # rebuilt from vertical position rather than from its block/line numbers
+    if not words:
+        return []
+    heights = sorted(w['y1'] - w['y0'] for w in words)
+    tolerance = heights[len(heights) // 2] / 2
+    lines, current, centre = [], [], None
+    for w in sorted(words, key=lambda w: (w['y0'] + w['y1']) / 2):
+        mid = (w['y0'] + w['y1']) / 2
+        if current and mid - centre > tolerance:
+            lines.append(current)
+            current = []
+        if not current:
+            centre = mid
+        current.append(w)
+    lines.append(current)
+    return lines
+
+
+def words_to_rows(words):
+    """Group OCR words into lines and cells, aligned to the page's widest line"""
+    lines = []
+    for line_words in _group_lines(words):
+        line_words.sort(key=lambda w: w['x0'])
+        cells = []
+        for w in line_words:
+            if cells and w['x0'] - cells[-1]['x1'] <= CELL_GAP:
+                cells[-1]['text'] += ' ' + w['text']
+                cells[-1]['x1'] = w['x1']
+            else:
+                cells.append({'text': w['text'], 'x0': w['x0'], 'x1': w['x1']})
+        lines.append(cells)
+
+    if not lines:
+        return []
+
+    anchors = _column_anchors(lines)
+    rows = []
+    for cells in lines:
+        row = [None] * len(anchors)
+        for cell in cells:
+            col = min(range(len(anchors)), key=lambda k: abs(anchors[k] - cell['x0']))
+            row[col] = cell['text'] if row[col] is None else row[col] + ' ' + cell['text']
+        rows.append(row)
+    return rows
+
+
+def rows_to_text(rows):
+    """One cell per line, the same shape page.get_text() gives for tabular pages"""
+    return "\n".join(cell for row in rows for cell in row if cell)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import sqlite3
+import time
+import fitz
+
+MAX_BYTES = 256 * 1024 * 1024   # cached page data kept before the least recently used goes
+EXTRACTOR_VERSION = 1           # bump when page_tables / OCR row building changes its output
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_cache (
+    digest TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    data TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (digest, profile)
+);
+CREATE INDEX IF NOT EXISTS page_cache_used ON page_cache (used_at);
+"""
+
+
+def page_digest(doc, page):
+    """Digest of what a page draws: its content stream plus the resources that stream uses
+
+    Object numbers differ between two files carrying the same page, so
+    resources go in by content: form and image streams, and each font's
+    name, encoding and ToUnicode map (the map decides what text the glyph
+    codes turn into).
+    """
+    h = hashlib.sha256()
+    h.update(repr((tuple(page.rect), page.rotation)).encode())
+    h.update(page.read_contents())
+    for xref in sorted({x[0] for x in page.get_xobjects()} | {x[0] for x in page.get_images()}):
+        h.update(doc.xref_stream_raw(xref) or b'')
+    for xref, _, _, basefont, name, encoding, *_ in page.get_fonts():
+        h.update(f"{name}|{basefont}|{encoding}".encode())
+        kind, value = doc.xref_get_key(xref, 'ToUnicode')
+        if kind == 'xref':
+            h.update(doc.xref_stream_raw(int(value.split()[0])) or b'')
+    return h.hexdigest()
+
+
+def profile(kind, strategy=None, start_markers=(), end_markers=()):
+    """What else an output depends on: extractor, strategy, PyMuPDF version, and bank markers where they matter
+
+    A cached page's rows do not depend on the markers (they only decide
+    which pages are read), so the page cache leaves them out; a file's
+    checkpoint journal, which holds one selection of pages, includes them.
+    """
+    return json.dumps([kind, strategy, list(start_markers), list(end_markers),
+                       fitz.VersionBind, EXTRACTOR_VERSION])
+
+
+class PageCache:
+    """Extracted rows per page, shared across documents
+
+    A cumulative or re-issued statement repeats pages already parsed from an
+    earlier file; those pages are answered from here and only new pages go
+    through detection. Entries are evicted least recently used first once
+    their data passes max_bytes. With db_path=None nothing is read or written.
+    """
+
+    def __init__(self, db_path, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.conn = None
+        if not db_path:
+            return
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_many(self, digests, profile):
+        """{digest: data} for the digests cached under profile"""
+        digests = list(set(digests))
+        if self.conn is None or not digests:
+            return {}
+        found = {}
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            found.update((digest, json.loads(data)) for digest, data in self.conn.execute(
+                f"SELECT digest, data FROM page_cache WHERE profile = ? "
+                f"AND digest IN ({', '.join('?' * len(chunk))})", [profile, *chunk]))
+        if found:
+            with self.conn:
+                self.conn.executemany("UPDATE page_cache SET used_at = ? WHERE digest = ? AND profile = ?",
+                                      [(time.time(), digest, profile) for digest in found])
+        return found
+
+    def put_many(self, pages, profile):
+        """Store {digest: data} under profile, then evict down to max_bytes"""
+        if self.conn is None or not pages:
+            return
+        now = time.time()
+        rows = []
+        for digest, data in pages.items():
+            text = json.dumps(data)
+            rows.append((digest, profile, text, len(text), now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO page_cache (digest, profile, data, bytes, used_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+        self.evict()
+
+    def evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM page_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess, doomed = total - self.max_bytes, []
+        for digest, profile, size in self.conn.execute(
+                "SELECT digest, profile, bytes FROM page_cache ORDER BY used_at"):
+            doomed.append((digest, profile))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.conn:
+            self.conn.executemany("DELETE FROM page_cache WHERE digest = ? AND profile = ?", doomed)
+        return len(doomed)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,231 @@
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import types
+import uuid
+import fitz
+import pandas as pd
+from scripts.extraction import file_digest
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+STAGE_DIR = 'stages'
+
+
+def _sha(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def _scripts_deps(module, seen, top=True):
+    """This module (wherever it lives) and every scripts.* module it uses, directly or through another one"""
+    if module.__name__ in seen or not (top or module.__name__.startswith('scripts.')):
+        return
+    seen[module.__name__] = module
+    for value in vars(module).values():
+        if isinstance(value, types.ModuleType):
+            _scripts_deps(value, seen, top=False)
+        elif callable(value) and getattr(value, '__module__', '') != module.__name__:
+            # from scripts.x import y
+            owner = sys.modules.get(getattr(value, '__module__', None) or '')
+            if owner is not None:
+                _scripts_deps(owner, seen, top=False)
+
+
+def code_version(module):
+    """Digest of a module's source and of the scripts modules it depends on"""
+    seen = {}
+    _scripts_deps(module, seen)
+    return _sha(*(f"{name}\n{inspect.getsource(seen[name])}" for name in sorted(seen)))
+
+
+@functools.lru_cache(maxsize=None)
+def stage_versions(bank):
+    """(extract, parse) code versions for a bank module name, worked out once per process
+
+    extract covers the bank's extract_all_tables and markers, the shared
+    extraction code and the PyMuPDF build; parse covers the whole bank
+    module and its helpers, so any edit there re-runs parse only.
+    """
+    from scripts import extraction
+    bank = importlib.import_module(bank)
+    extract = _sha(inspect.getsource(bank.extract_all_tables),
+                   getattr(bank, 'START_MARKERS', ()), getattr(bank, 'END_MARKERS', ()),
+                   code_version(extraction), fitz.VersionBind)
+    return extract, code_version(bank)
+
+
+def _write(path, write):
+    # Write-then-rename so a killed run never leaves a half-written output behind
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_text(path, text):
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+    _write(path, write)
+
+
+def save_frame(df, stem):
+    """Arrow IPC when pyarrow can type the frame, a pickle otherwise; returns the file name"""
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowException, ValueError, TypeError):
+            table = None
+        if table is not None:
+            def write(tmp):
+                with pa.OSFile(tmp, 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            _write(f"{stem}.arrow", write)
+            return f"{stem}.arrow"
+    _write(f"{stem}.pkl", df.to_pickle)
+    return f"{stem}.pkl"
+
+
+def load_frame(path):
+    if path.endswith('.arrow'):
+        return pa.ipc.open_file(pa.memory_map(path)).read_all().to_pandas()
+    return pd.read_pickle(path)
+
+
+def _save(value, stem):
+    """Persist a stage output; returns (meta, digest of the output)"""
+    meta = {}
+    frame = value
+    if isinstance(value, tuple):
+        frame, metrics = value
+        meta['metrics'] = None if metrics is None else [float(m) for m in metrics]
+    path = None
+    if isinstance(frame, str):
+        path = f"{stem}.txt"
+        _write_text(path, frame)
+    elif frame is not None:
+        path = save_frame(frame, stem)
+    if path is not None:
+        # Relative to the stage folder, so stage_dir can be moved or shared
+        meta['file'] = os.path.basename(path)
+    digest = file_digest(path) if path is not None else 'none'
+    return meta, _sha(digest, meta.get('metrics'))
+
+
+def _load(meta, folder, tupled):
+    path = meta.get('file') and os.path.join(folder, meta['file'])
+    if path is None:
+        frame = None
+    elif path.endswith('.txt'):
+        with open(path, encoding='utf-8') as f:
+            frame = f.read()
+    else:
+        frame = load_frame(path)
+    if tupled:
+        metrics = meta['metrics']
+        return frame, None if metrics is None else tuple(metrics)
+    return frame
+
+
+def run_stage(stage_dir, name, version, inputs, compute, tupled=False):
+    """Output of one stage for these inputs, computed only if not stored yet
+
+    Returns (value, output digest, ran). The output digest, not the key,
+    feeds the next stage, so a new extractor version that extracts the same
+    rows leaves parse outputs valid.
+    """
+    key = _sha(name, version, *inputs)
+    folder = os.path.join(stage_dir, name, key[:2])
+    meta_path = os.path.join(folder, f"{key}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return _load(meta, folder, tupled), meta['digest'], False
+
+    os.makedirs(folder, exist_ok=True)
+    value = compute()
+    meta, digest = _save(value, os.path.join(folder, key))
+    meta['digest'] = digest
+    # The meta file goes last: its presence marks the output complete
+    _write_text(meta_path, json.dumps(meta))
+    return value, digest, True
+
+
+def run_staged(bank, pdf_path, route=None, checkpoint_dir=None, stage_dir=None):
+    """(std_df, metrics, names of the stages that had to run) for one PDF
+
+    A bank's full parse is two stages, extract (PDF to raw table, or raw
+    text for HDFC) and parse (raw to std_df and metrics), each stored under
+    stage_dir. After a standardization or metrics fix only parse runs
+    again, from the stored raw tables rather than the PDFs.
+    """
+    module = importlib.import_module(bank)
+    stage_dir = stage_dir or os.getenv('stage_dir', STAGE_DIR)
+    extract_version, parse_version = stage_versions(bank)
+    pdf = file_digest(pdf_path)
+    # HDFC is always read as text and takes no route
+    text_only = 'route' not in inspect.signature(module.extract_all_tables).parameters
+
+    def extract():
+        if text_only:
+            return module.extract_all_tables(pdf_path, checkpoint_dir)
+        return module.extract_all_tables(pdf_path, route, checkpoint_dir)
+
+    raw, raw_digest, extracted = run_stage(
+        stage_dir, 'extract', extract_version, (bank, pdf, None if text_only else route), extract)
+    ran = ['extract'] if extracted else []
+    if raw is None or (isinstance(raw, str) and len(raw) == 0):
+        return None, (0, 0, 0, 0), ran
+
+    # parse still sees the PDF: some banks read printed totals from it
+    (std_df, metrics), _, parsed = run_stage(
+        stage_dir, 'parse', parse_version, (bank, pdf, raw_digest),
+        lambda: module.parse(raw, pdf_path), tupled=True)
+    if parsed:
+        ran.append('parse')
+    return std_df, metrics, ran
+
+
+def run(pdf_path, poppler_bin=None, bank=None, mode="full", route=None, checkpoint_dir=None, stage_dir=None):
+    """A bank module's run(), through the stages; bank is the module name, e.g. 'scripts.script_sbi'
+
+    Takes a bank run()'s arguments, so WorkerPool, shard.plan and the job
+    queue can use 'scripts.pipeline' as the module with bank= in kwargs.
+    """
+    if bank is None:
+        raise ValueError("bank is required, e.g. bank='scripts.script_sbi'")
+    if mode == "summary":
+        metrics = importlib.import_module(bank).extract_summary(pdf_path)
+        if metrics is not None:
+            return None, metrics
+        print("No printed summary found, falling back to full parsing.")
+    std_df, metrics, _ = run_staged(bank, pdf_path, route, checkpoint_dir, stage_dir)
+    return std_df, metrics
+
+
+def reprocess(bank, pdf_paths, stage_dir=None, route=None):
+    """Run a corpus through the stages; returns how many PDFs each stage actually ran for"""
+    counts = {'pdfs': 0, 'extract': 0, 'parse': 0, 'failed': 0}
+    for pdf_path in pdf_paths:
+        counts['pdfs'] += 1
+        try:
+            _, _, ran = run_staged(bank, pdf_path, route, stage_dir=stage_dir)
+        except Exception as e:
+            print(f"Failed on {pdf_path}: {e}")
+            counts['failed'] += 1
+            continue
+        for name in ran:
+            counts[name] += 1
+    return counts
@@ -0,0 +1,85 @@
+import numpy as np
+from scripts.normalize import to_amount, to_balance
+
+TOLERANCE = 0.01  # balances are printed to the paisa
+
+
+def balance_steps(txns, opening=None):
+    """Per checkable row: how far the printed balance moved and how far the amounts say it should have
+
+    Rows without a balance are folded into the next row that has one, so a
+    balance printed only once per day is still checked against every row
+    of that day. Returns (positions, moved, expected) as numpy arrays.
+    """
+    balance = txns['balance'].to_numpy(dtype=float)
+    cum = (txns['credit'] - txns['debit']).to_numpy(dtype=float).cumsum()
+    known = np.flatnonzero(~np.isnan(balance))
+    if known.size == 0:
+        return known, np.empty(0), np.empty(0)
+    moved = np.diff(balance[known])
+    expected = np.diff(cum[known])
+    positions = known[1:]
+    if opening is not None:
+        positions = known
+        moved = np.concatenate(([balance[known[0]] - opening], moved))
+        expected = np.concatenate(([cum[known[0]]], expected))
+    return positions, moved, expected
+
+
+def check(txns, opening=None, tolerance=TOLERANCE):
+    """Statement-level integrity report for a canonical frame (see normalize.canonical)
+
+    score is the share of checkable rows whose balance follows from the one
+    before; broken lists the row positions where it does not. opening is
+    the balance implied before the first row.
+    """
+    positions, moved, expected = balance_steps(txns, opening)
+    ok = np.abs(moved - expected) <= tolerance
+    balance = txns['balance'].to_numpy(dtype=float)
+    known = np.flatnonzero(~np.isnan(balance))
+    implied = None
+    if known.size:
+        first = known[0]
+        implied = float(balance[first] - (txns['credit'] - txns['debit']).iloc[:first + 1].sum())
+    return {
+        'rows': len(txns),
+        'checked': int(positions.size),
+        'broken': positions[~ok].tolist(),
+        'score': float(ok.mean()) if positions.size else None,
+        'opening': implied,
+    }
+
+
+def side_mask(debit, credit, balance, tolerance=TOLERANCE):
+    """Rows whose single amount sits in the wrong column according to the balance delta
+
+    Only rows directly following a printed balance, with one non-zero amount
+    whose size matches the balance move, are judged; everything else is left
+    as parsed.
+    """
+    amount = np.where(debit != 0, debit, credit)
+    one_sided = (debit == 0) ^ (credit == 0)
+    delta = np.empty_like(balance)
+    delta[0] = np.nan
+    delta[1:] = balance[1:] - balance[:-1]
+    matches = one_sided & (np.abs(np.abs(delta) - amount) <= tolerance) & (amount > tolerance)
+    says_credit = delta > 0
+    return matches & (says_credit != (credit != 0))
+
+
+def fix_sides(df, debit_col, credit_col, balance_col, tolerance=TOLERANCE):
+    """Move amounts to the side the balance delta implies, on a bank's own string columns"""
+    if df is None or df.empty:
+        return df
+    debit = to_amount(df[debit_col]).fillna(0.0).to_numpy()
+    credit = to_amount(df[credit_col]).fillna(0.0).to_numpy()
+    balance = to_balance(df[balance_col]).to_numpy(dtype=float)
+    swap = side_mask(debit, credit, balance, tolerance)
+    if not swap.any():
+        return df
+    df = df.copy()
+    debit_vals, credit_vals = df[debit_col].to_numpy(), df[credit_col].to_numpy()
+    df[debit_col] = np.where(swap, credit_vals, debit_vals)
+    df[credit_col] = np.where(swap, debit_vals, credit_vals)
+    print(f"Moved {int(swap.sum())} amounts to the side implied by the running balance.")
+    return df
@@ -0,0 +1,97 @@
+import re
+import numpy as np
+import pandas as pd
+from scripts import dates, narration
+
+AMOUNT_TOLERANCE = 0.10   # amounts within 10% of each other fall in the same band
+MIN_OCCURRENCES = 3
+REGULAR_SHARE = 0.75      # share of gaps that must sit near the typical gap
+
+# (name, shortest gap, longest gap) in days
+PERIODS = [('weekly', 6, 8), ('fortnightly', 13, 16), ('monthly', 26, 35), ('quarterly', 85, 95)]
+
+KINDS = [
+    # (kind, direction, narration pattern); first match wins, checked against any row of the series
+    ('salary', 'credit', re.compile(r'\bSAL(?:ARY)?\b|\bPAYROLL\b')),
+    ('sip', 'debit', re.compile(r'\bSIP\b|MUTUAL ?FUND|\bMF\b|\bAMC\b')),
+    ('emi', 'debit', re.compile(r'\bEMI\b|\bLOAN\b|FINANCE|\bFIN\b|CAPITAL|LENDING')),
+    ('rent', 'debit', re.compile(r'\bRENT\b|LANDLORD')),
+]
+
+BOUNCE = re.compile(r'\bRE?TN\b|\bCHQ ?RET|\bRET(?:URN(?:ED)?)?\b.*\b(?:CHQ|CHEQUE|ACH|NACH|ECS)\b|'
+                    r'\b(?:ACH|NACH|ECS)\b.*\bRET(?:URN(?:ED)?)?\b|BOUNCE|DISHONOU?R|INSUFF(?:ICIENT)?')
+CHARGE = re.compile(r'CHRG|CHARGE|CHGS|\bFEE\b|PENAL')
+
+
+def flag_bounces(txns):
+    """'return' for a bounced cheque/mandate, 'charge' for the bank's bounce fee, else None"""
+    text = txns['narration'].fillna('').astype(str).str.upper()
+    bounced = text.str.contains(BOUNCE, regex=True)
+    charged = text.str.contains(CHARGE, regex=True)
+    return pd.Series(np.where(bounced, np.where(charged, 'charge', 'return'), None), index=txns.index, name='bounce')
+
+
+def detect(txns, parsed=None):
+    """Recurring debits and credits, one row per series found
+
+    txns is a canonical frame or store rows; an 'account' column, when
+    present, keeps accounts apart. Rows are grouped on account, direction,
+    normalized counterparty and an amount band (sorted amounts split where
+    one is more than AMOUNT_TOLERANCE above the previous), then each group's
+    date gaps are tested for a steady period. Everything is grouped
+    pandas/numpy work, so many accounts go through in one call.
+    """
+    amount = (txns['credit'] - txns['debit']).astype(float)
+    if parsed is None:
+        parsed = narration.parse(txns['narration'], amount)
+    frame = pd.DataFrame({
+        'account': txns['account'] if 'account' in txns else '',
+        'direction': np.where(amount >= 0, 'credit', 'debit'),
+        'counterparty': narration.counterparty_key(txns['narration'], parsed),
+        'amount': amount.abs(),
+        'date': dates.parse(txns['date']),
+        'text': txns['narration'].fillna('').astype(str).str.upper(),
+        'mandate': parsed['channel'] == 'NACH',
+    })
+    frame = frame[(frame['amount'] > 0) & frame['date'].notna() & (frame['counterparty'] != '')]
+    if frame.empty:
+        return pd.DataFrame(columns=['account', 'counterparty', 'direction', 'kind', 'period', 'count',
+                                     'amount', 'first', 'last', 'next_expected'])
+
+    keys = ['account', 'direction', 'counterparty']
+    frame = frame.sort_values(keys + ['amount'])
+    same_key = (frame[keys] == frame[keys].shift()).all(axis=1)
+    jump = frame['amount'] > frame['amount'].shift() * (1 + AMOUNT_TOLERANCE)
+    frame['band'] = (~same_key | jump).cumsum()
+
+    frame = frame.sort_values(['band', 'date'])
+    gap = frame['date'].diff().dt.days.where(frame['band'] == frame['band'].shift())
+    frame['gap'] = gap
+
+    grouped = frame.groupby('band', sort=False)
+    series = grouped.agg(account=('account', 'first'), direction=('direction', 'first'),
+                         counterparty=('counterparty', 'first'), count=('date', 'size'),
+                         amount=('amount', 'median'), first=('date', 'min'), last=('date', 'max'),
+                         typical_gap=('gap', 'median'))
+    series = series[series['count'] >= MIN_OCCURRENCES]
+
+    frame = frame[frame['band'].isin(series.index)]
+    near = (frame['gap'] - frame['band'].map(series['typical_gap'])).abs() <= 3
+    regular = near.groupby(frame['band']).sum() / (series['count'] - 1)
+    series['period'] = None
+    for name, low, high in PERIODS:
+        series.loc[series['typical_gap'].between(low, high), 'period'] = name
+    series = series[series['period'].notna() & (regular.reindex(series.index) >= REGULAR_SHARE)]
+
+    series['kind'] = 'recurring_' + series['direction']
+    text = frame[frame['band'].isin(series.index)]
+    for kind, direction, pattern in reversed(KINDS):
+        hit = text['text'].str.contains(pattern, regex=True).groupby(text['band']).any()
+        hit = hit.reindex(series.index, fill_value=False) & (series['direction'] == direction)
+        series.loc[hit, 'kind'] = kind
+    # An unlabelled monthly mandate debit is almost always a loan instalment
+    mandate = text['mandate'].groupby(text['band']).any().reindex(series.index, fill_value=False)
+    series.loc[mandate & (series['kind'] == 'recurring_debit') & (series['period'] == 'monthly'), 'kind'] = 'emi'
+    series['next_expected'] = series['last'] + pd.to_timedelta(series['typical_gap'], unit='D')
+    return series[['account', 'counterparty', 'direction', 'kind', 'period', 'count',
+                   'amount', 'first', 'last', 'next_expected']].reset_index(drop=True)
@@ -6,10 +6,9 @@ import numpy as np
 import requests
 import json
 from fuzzywuzzy import process
-from pdf2image import convert_from_path
-import pytesseract
 import re
-import pandas as pd
+from scripts import coalesce, dates, extraction, summary
+from scripts.account_info import extract_account_info
 
 load_dotenv()
 poppler_bin = os.getenv('poppler_bin')
@@ -18,41 +17,27 @@ if poppler_bin is None:
     raise ValueError("Environment variable poppler_bin is not set!")
 print("Poppler path being used:", poppler_bin)
 
-def extract_all_tables(pdf_path):
-    tables = []
-    doc = fitz.open(pdf_path)
-
-    for page_number, page in enumerate(doc, 1):
-        table_data = page.find_tables()
-        if table_data.tables:
-            for table in table_data.tables:
-                raw_data = table.extract()
-                if raw_data and len(raw_data):
-                    df = pd.DataFrame(raw_data)
-                    tables.append(df)
-    
-    if not tables:
-        print("No tables found in the PDF.")
-        return None
-    
-    result_df = pd.concat(tables, ignore_index=True)
-    result_df = result_df.dropna(how='all')  # drop empty rows
-    return result_df
+# Pages before a start marker are skipped; scanning stops after the page with an end marker
+START_MARKERS = ('tran date',)
+END_MARKERS = ('transaction total',)
 
-def ocr_extract_account_info(pdf_path, poppler_bin):
-    # Convert first page (or all) to image(s)
-    images = convert_from_path(pdf_path, dpi=300, poppler_path=poppler_bin)
-    first_page_text = pytesseract.image_to_string(images[0])  # OCR first page only
+# Dates as printed in the transaction table, most common first
+DATE_FORMATS = ('%d-%m-%Y', '%d/%m/%Y') + dates.DEFAULT_FORMATS
 
-    # Use regex or manual string search for account number and name
-    # Customize these regex patterns to your PDF text layout
-    acc_no_match = re.search(r'Account Number[:\s]*([\d]+)', first_page_text, re.IGNORECASE)
-    acc_name_match = re.search(r'Account Holders? Name[:\s]*([A-Z\s]+)', first_page_text, re.IGNORECASE)
+SUMMARY_PATTERNS = {
+    'opening': r'opening\s*balance\s*' + summary.AMOUNT,
+    'debits': r'transaction\s*total\s*' + summary.AMOUNT,
+    'credits': r'transaction\s*total\s*-?[\d,]+\.\d{1,2}\s*' + summary.AMOUNT,
+    'closing': r'closing\s*balance\s*' + summary.AMOUNT,
+}
 
-    acc_no = acc_no_match.group(1).strip() if acc_no_match else None
-    acc_name = acc_name_match.group(1).strip() if acc_name_match else None
+def extract_all_tables(pdf_path, route=None, checkpoint_dir=None):
+    return extraction.extract_tables(pdf_path, START_MARKERS, END_MARKERS, route, checkpoint_dir)
 
-    return acc_name, acc_no
+def ocr_extract_account_info(pdf_path, poppler_bin=None):
+    # Text layer first; OCR of page 0 only happens for scanned statements
+    info = extract_account_info(pdf_path)
+    return info['name'], info['account_no']
 
 def calculate_metrics(df):
     total_credit = 0
@@ -199,13 +184,30 @@ def clean_repeated_headers(df):
 #         df['description'] = ""
 #     return df 
 
-def run(pdf_path, poppler_bin):
-    # acc_name, acc_no = ocr_extract_account_info(pdf_path, poppler_bin)
-    raw_table = extract_all_tables(pdf_path)
-    if raw_table is None:
-        return None, (0,0,0,0)
+def extract_summary(pdf_path):
+    found = summary.find_summary(pdf_path, SUMMARY_PATTERNS)
+    if found is None:
+        return None
+    return found['debits'], found['credits'], found['opening'], found['closing']
+
+def parse(raw_table, pdf_path):
+    """Everything after extraction: the raw table to (std_df, metrics)"""
     txn_df = extract_transactions(raw_table)
     txn_df = clean_repeated_headers(txn_df)
     std_df = standardize(txn_df)
+    std_df = coalesce.rows(std_df, 'date', ['particulars'], ['debit', 'credit', 'balance'])
+    std_df['date'] = dates.parse_column(std_df['date'], DATE_FORMATS)
     total_debit, total_credit, opening_bal, closing_bal = calculate_metrics(std_df)
     return std_df, (total_debit, total_credit, opening_bal, closing_bal)
+
+def run(pdf_path, poppler_bin, mode="full", route=None, checkpoint_dir=None):
+    if mode == "summary":
+        metrics = extract_summary(pdf_path)
+        if metrics is not None:
+            return None, metrics
+        print("No printed summary found, falling back to full parsing.")
+    # acc_name, acc_no = ocr_extract_account_info(pdf_path, poppler_bin)
+    raw_table = extract_all_tables(pdf_path, route, checkpoint_dir)
+    if raw_table is None:
+        return None, (0,0,0,0)
+    return parse(raw_table, pdf_path)
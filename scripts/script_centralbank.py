@@ -7,6 +7,7 @@ import requests
 import json
 from fuzzywuzzy import process
 import re
+from scripts import coalesce, dates, extraction, summary
 
 load_dotenv()
 poppler_bin = os.getenv('poppler_bin')
@@ -14,26 +15,15 @@ poppler_bin = os.getenv('poppler_bin')
 if poppler_bin is None:
     raise ValueError("Environment variable poppler_bin is not set!")
 
-def extract_all_tables(pdf_path):
-    tables = []
-    doc = fitz.open(pdf_path)
-
-    for page_number, page in enumerate(doc, 1):
-        table_data = page.find_tables()
-        if table_data.tables:
-            for table in table_data.tables:
-                raw_data = table.extract()
-                if raw_data and len(raw_data):
-                    df = pd.DataFrame(raw_data)
-                    tables.append(df)
-    
-    if not tables:
-        print("No tables found in the PDF.")
-        return None
-    
-    result_df = pd.concat(tables, ignore_index=True)
-    result_df = result_df.dropna(how='all')  # drop empty rows
-    return result_df
+# Pages before a start marker are skipped; scanning stops after the page with an end marker
+START_MARKERS = ('value date', 'post date', 'posting date')
+END_MARKERS = ()
+
+# Dates as printed in the transaction table, most common first
+DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y') + dates.DEFAULT_FORMATS
+
+def extract_all_tables(pdf_path, route=None, checkpoint_dir=None):
+    return extraction.extract_tables(pdf_path, START_MARKERS, END_MARKERS, route, checkpoint_dir)
 
 def clean_balance(val):
     if pd.isna(val):
@@ -164,13 +154,30 @@ def calculate_metrics(df):
 #         df['description'] = ""
 #     return df 
 
-def run(pdf_path, poppler_bin):
-    raw_table = extract_all_tables(pdf_path)
-    if raw_table is None:
-        return None, (0,0,0,0)
+def extract_summary(pdf_path):
+    found = summary.find_summary(pdf_path)
+    if found is None:
+        return None
+    return found['credits'], found['debits'], found['opening'], found['closing']
+
+def parse(raw_table, pdf_path):
+    """Everything after extraction: the raw table to (std_df, metrics)"""
     txn_df = extract_transactions(raw_table)
     txn_df = clean_repeated_headers(txn_df)
     std_df = standardize(txn_df)
+    std_df = coalesce.rows(std_df, 'date', ['account description'], ['debit', 'credit', 'balance'])
+    std_df['date'] = dates.parse_column(std_df['date'], DATE_FORMATS)
     # print(std_df['balance'].head())
     total_debit, total_credit, opening_bal, closing_bal = calculate_metrics(std_df)
     return std_df, (total_credit, total_debit, opening_bal, closing_bal)
+
+def run(pdf_path, poppler_bin, mode="full", route=None, checkpoint_dir=None):
+    if mode == "summary":
+        metrics = extract_summary(pdf_path)
+        if metrics is not None:
+            return None, metrics
+        print("No printed summary found, falling back to full parsing.")
+    raw_table = extract_all_tables(pdf_path, route, checkpoint_dir)
+    if raw_table is None:
+        return None, (0,0,0,0)
+    return parse(raw_table, pdf_path)
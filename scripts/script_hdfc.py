@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 import re
 from fuzzywuzzy import process
+from scripts import dates, extraction, reconcile, summary
 
 load_dotenv()
 poppler_bin = os.getenv('poppler_bin')
@@ -12,15 +13,19 @@ poppler_bin = os.getenv('poppler_bin')
 if poppler_bin is None:
     raise ValueError("Environment variable poppler_bin is not set!")
 
-def extract_all_tables(pdf_path):
+# Pages before a start marker are skipped; scanning stops after the page with an end marker
+START_MARKERS = ()
+END_MARKERS = ('statement summary',)
+
+# Dates as printed in the transaction table, most common first
+DATE_FORMATS = ('%d/%m/%y',) + dates.DEFAULT_FORMATS
+
+# STATEMENT SUMMARY prints its six labels first, then the six values in the same order
+SUMMARY_BLOCK = ('STATEMENT SUMMARY', ('opening', None, None, 'debits', 'credits', 'closing'))
+
+def extract_all_tables(pdf_path, checkpoint_dir=None):
     """Extract all text from PDF using PyMuPDF"""
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        full_text += page.get_text() + "\n"
-    doc.close()
-    return full_text
+    return extraction.extract_text(pdf_path, START_MARKERS, END_MARKERS, checkpoint_dir)
 
 def form_table(raw_text):
     date_pat   = re.compile(r'^\d{2}/\d{2}/\d{2}$')
@@ -205,18 +210,37 @@ def calculate_metrics(df):
     
     return total_credit, total_debit, opening_bal, closing_bal
 
-def run(pdf_path, poppler_bin):
-    """Main function to process PDF and return transaction data"""
-    raw_text = extract_all_tables(pdf_path)
-    if len(raw_text) == 0:
-        return None, (0, 0, 0, 0)
-    
+def extract_summary(pdf_path):
+    found = summary.find_summary(pdf_path, block=SUMMARY_BLOCK)
+    if found is None:
+        return None
+    return found['credits'], found['debits'], found['opening'], found['closing']
+
+def parse(raw_text, pdf_path):
+    """Everything after extraction: the raw text to (std_df, metrics)"""
     txn_df = form_table(raw_text)
     if txn_df.empty:
         return None, (0, 0, 0, 0)
         
     txn_df = clean_repeated_headers(txn_df)
     std_df = standardize(txn_df)
+    if not std_df.empty:
+        std_df['date'] = dates.parse_column(std_df['date'], DATE_FORMATS)
+    # form_table only guesses the side from narration keywords; the running balance settles it
+    std_df = reconcile.fix_sides(std_df, 'withdrawal', 'deposit', 'closing_balance')
     total_credit, total_debit, opening_bal, closing_bal = calculate_metrics(std_df)
     
     return std_df, (total_credit, total_debit, opening_bal, closing_bal)
+
+def run(pdf_path, poppler_bin, mode="full", route=None, checkpoint_dir=None):
+    """Main function to process PDF and return transaction data"""
+    # HDFC is always read as a text stream, whatever the triage route
+    if mode == "summary":
+        metrics = extract_summary(pdf_path)
+        if metrics is not None:
+            return None, metrics
+        print("No printed summary found, falling back to full parsing.")
+    raw_text = extract_all_tables(pdf_path, checkpoint_dir)
+    if len(raw_text) == 0:
+        return None, (0, 0, 0, 0)
+    return parse(raw_text, pdf_path)
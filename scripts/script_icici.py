@@ -7,6 +7,7 @@ import requests
 import json
 from fuzzywuzzy import process
 import re
+from scripts import coalesce, dates, extraction, summary
 
 load_dotenv()
 poppler_bin = os.getenv('poppler_bin')
@@ -14,26 +15,22 @@ poppler_bin = os.getenv('poppler_bin')
 if poppler_bin is None:
     raise ValueError("Environment variable poppler_bin is not set!")
 
-def extract_all_tables(pdf_path):
-    tables = []
-    doc = fitz.open(pdf_path)
+# Pages before a start marker are skipped; scanning stops after the page with an end marker
+START_MARKERS = ('sl no',)
+END_MARKERS = ()
 
-    for page_number, page in enumerate(doc, 1):
-        table_data = page.find_tables()
-        if table_data.tables:
-            for table in table_data.tables:
-                raw_data = table.extract()
-                if raw_data and len(raw_data):
-                    df = pd.DataFrame(raw_data)
-                    tables.append(df)
-    
-    if not tables:
-        print("No tables found in the PDF.")
-        return None
-    
-    result_df = pd.concat(tables, ignore_index=True)
-    result_df = result_df.dropna(how='all')  # drop empty rows
-    return result_df
+# Dates as printed in the transaction table, most common first
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%d-%b-%Y') + dates.DEFAULT_FORMATS
+
+SUMMARY_PATTERNS = {
+    "opening": r"opening\s*bal\s*[:\-]?\s*([-\d,]+\.\d+)",
+    "debits": r"withdrawls?\s*[:\-]?\s*([-\d,]+\.\d+)",
+    "credits": r"deposits?\s*[:\-]?\s*([-\d,]+\.\d+)",
+    "closing": r"closing\s*bal\s*[:\-]?\s*([-\d,]+\.\d+)",
+}
+
+def extract_all_tables(pdf_path, route=None, checkpoint_dir=None):
+    return extraction.extract_tables(pdf_path, START_MARKERS, END_MARKERS, route, checkpoint_dir)
 
 
 def extract_transactions(df):
@@ -89,10 +86,7 @@ def standardize(df):
                 .str.strip()
             )
             if std_col == 'date':
-                try:
-                    col_data = pd.to_datetime(col_data, errors='coerce', dayfirst=True).dt.date
-                except Exception as e:
-                    print(f"Date parsing error: {e}")
+                col_data = dates.parse_column(col_data, DATE_FORMATS)
 
             std_df[std_col] = col_data
         else:
@@ -113,31 +107,13 @@ def extract_summary_metrics(pdf_path):
     for page in doc[-2:]:  
         full_text += page.get_text()
 
-    metrics = {
-        "opening_bal": 0.0,
-        "withdrawls": 0.0,
-        "deposits": 0.0,
-        "closing_bal": 0.0,
-    }
-
-    patterns = {
-        "opening_bal": r"opening\s*bal\s*[:\-]?\s*([-\d,]+\.\d+)",
-        "withdrawls": r"withdrawls?\s*[:\-]?\s*([-\d,]+\.\d+)",
-        "deposits": r"deposits?\s*[:\-]?\s*([-\d,]+\.\d+)",
-        "closing_bal": r"closing\s*bal\s*[:\-]?\s*([-\d,]+\.\d+)",
-    }
-
-    for key, pattern in patterns.items():
-        match = re.search(pattern, full_text, re.IGNORECASE)
-        if match:
-            value = match.group(1).replace(',', '')
-            metrics[key] = float(value)
+    metrics = summary.match_patterns(full_text, SUMMARY_PATTERNS, {})
 
     return (
-        metrics["deposits"],
-        metrics["withdrawls"],
-        metrics["opening_bal"],
-        metrics["closing_bal"]
+        metrics.get("credits", 0.0),
+        metrics.get("debits", 0.0),
+        metrics.get("opening", 0.0),
+        metrics.get("closing", 0.0)
     )
 
 def calculate_metrics(df):
@@ -184,12 +160,28 @@ def calculate_metrics(df):
 #         df['description'] = ""
 #     return df 
 
-def run(pdf_path, poppler_bin):
-    raw_table = extract_all_tables(pdf_path)
-    if raw_table is None:
-        return None, (0,0,0,0)
+def extract_summary(pdf_path):
+    found = summary.find_summary(pdf_path, SUMMARY_PATTERNS, pages=(-1, -2))
+    if found is None:
+        return None
+    return found['credits'], found['debits'], found['opening'], found['closing']
+
+def parse(raw_table, pdf_path):
+    """Everything after extraction: the raw table to (std_df, metrics)"""
     txn_df = extract_transactions(raw_table)
     txn_df = clean_repeated_headers(txn_df)
     std_df = standardize(txn_df)
+    std_df = coalesce.rows(std_df, 'date', ['transaction remarks'], ['withdrawal', 'deposit', 'balance'])
     total_credit, total_debit, opening_bal, closing_bal = extract_summary_metrics(pdf_path)
     return std_df, (total_credit, total_debit, opening_bal, closing_bal)
+
+def run(pdf_path, poppler_bin, mode="full", route=None, checkpoint_dir=None):
+    if mode == "summary":
+        metrics = extract_summary(pdf_path)
+        if metrics is not None:
+            return None, metrics
+        print("No printed summary found, falling back to full parsing.")
+    raw_table = extract_all_tables(pdf_path, route, checkpoint_dir)
+    if raw_table is None:
+        return None, (0,0,0,0)
+    return parse(raw_table, pdf_path)
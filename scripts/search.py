@@ -0,0 +1,65 @@
+import sqlite3
+import pandas as pd
+
+# FTS5's trigram tokenizer indexes every 3-character substring, so UPI handles,
+# cheque numbers and partial lender names can all be found without a table scan
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS narration_index USING fts5(
+    narration, content='transactions', content_rowid='id', tokenize='trigram'
+)
+"""
+
+MIN_TERM = 3  # the trigram index cannot answer anything shorter
+
+
+def ensure_index(conn):
+    """Create the narration index, backfilling rows stored before it existed; False if unsupported"""
+    try:
+        conn.execute(INDEX_SCHEMA)
+    except sqlite3.OperationalError as e:
+        print(f"Narration index unavailable ({e}), searches will scan.")
+        return False
+    indexed = conn.execute("SELECT COUNT(*) FROM narration_index_docsize").fetchone()[0]
+    stored = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    if indexed != stored:
+        conn.execute("INSERT INTO narration_index(narration_index) VALUES ('rebuild')")
+        conn.commit()
+    return True
+
+
+def index_statement(conn, statement_id):
+    """Add one statement's narrations; run inside the transaction that stored them"""
+    conn.execute(
+        "INSERT INTO narration_index (rowid, narration) "
+        "SELECT id, narration FROM transactions WHERE statement_id = ?", (statement_id,))
+
+
+def fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search(conn, text, bank=None, account=None, start=None, end=None,
+           min_amount=None, max_amount=None, limit=1000, indexed=True):
+    """Transactions whose narration contains text (case-insensitive), with optional filters"""
+    clauses, params = [], []
+    text = text.strip()
+    if indexed and len(text) >= MIN_TERM:
+        source = "narration_index JOIN transactions t ON t.id = narration_index.rowid"
+        clauses.append("narration_index MATCH ?")
+        params.append(fts_phrase(text))
+    else:
+        source = "transactions t"
+        clauses.append("t.narration LIKE ? ESCAPE '\\'")
+        params.append('%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+
+    for sql, value in (("t.bank = ?", bank), ("t.account = ?", account),
+                       ("t.date >= ?", start), ("t.date <= ?", end),
+                       ("t.amount >= ?", min_amount), ("t.amount <= ?", max_amount)):
+        if value is not None:
+            clauses.append(sql)
+            params.append(value)
+
+    sql = f"SELECT t.* FROM {source} WHERE {' AND '.join(clauses)} ORDER BY t.date, t.id"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return pd.read_sql_query(sql, conn, params=params)
@@ -0,0 +1,207 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from scripts import export, extraction, reconcile
+from scripts.normalize import canonical
+from scripts.workers import run_job
+
+LEASE_SECONDS = 120     # a shard whose lease is not renewed for this long is reclaimed
+MANIFEST = 'manifest.json'
+
+
+def _write_json(path, data):
+    # Write-then-rename so readers on other hosts never see a half-written file
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def plan(root, pdf_paths, bank_module, shard_size=50, output_format='csv', **kwargs):
+    """Split a batch into shards and write the manifest that every host reads
+
+    output_format is any of export.FORMATS; each shard writes
+    transactions.<ext> in it.
+    """
+    if output_format not in export.FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}")
+    for sub in ('leases', 'done', 'output'):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    pdf_paths = sorted(os.path.abspath(p) for p in pdf_paths)
+    shards = [
+        {'id': f"{i // shard_size:05d}", 'bank_module': bank_module, 'kwargs': kwargs,
+         'output_format': output_format, 'pdf_paths': pdf_paths[i:i + shard_size]}
+        for i in range(0, len(pdf_paths), shard_size)
+    ]
+    _write_json(os.path.join(root, MANIFEST), {'shards': shards})
+    return len(shards)
+
+
+class Lease:
+    """Exclusive claim on one shard, kept alive by a heartbeat
+
+    Leases are files named <shard>.<generation>.lease. A host claims a shard
+    by creating the next generation with O_EXCL, which exactly one host can
+    win, and only when the newest generation has expired. The holder renews
+    its own file; it has lost the lease once a newer generation appears.
+    """
+
+    def __init__(self, root, shard_id, owner, lease_seconds=LEASE_SECONDS):
+        self.dir = os.path.join(root, 'leases')
+        self.shard_id = shard_id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.path = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _generations(self):
+        gens = []
+        for name in os.listdir(self.dir):
+            parts = name.split('.')
+            if len(parts) == 3 and parts[0] == self.shard_id and parts[2] == 'lease':
+                gens.append(int(parts[1]))
+        return sorted(gens)
+
+    def _lease_path(self, gen):
+        return os.path.join(self.dir, f"{self.shard_id}.{gen}.lease")
+
+    def _expired(self, path):
+        current = _read_json(path)
+        if current is not None:
+            return current.get('expires', 0) <= time.time()
+        # Unreadable: either still being written or left empty by a crash
+        try:
+            return os.path.getmtime(path) + self.lease_seconds <= time.time()
+        except FileNotFoundError:
+            return True
+
+    def _body(self):
+        return {'owner': self.owner, 'expires': time.time() + self.lease_seconds}
+
+    def acquire(self):
+        gens = self._generations()
+        if gens and not self._expired(self._lease_path(gens[-1])):
+            return False
+        gen = gens[-1] + 1 if gens else 0
+        path = self._lease_path(gen)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._body(), f)
+        self.path = path
+        for old in gens:
+            try:
+                os.remove(self._lease_path(old))
+            except FileNotFoundError:
+                pass
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+        return True
+
+    def held(self):
+        if self.path is None or not os.path.exists(self.path):
+            return False
+        gens = self._generations()
+        return bool(gens) and self._lease_path(gens[-1]) == self.path
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.held():
+                break
+            _write_json(self.path, self._body())
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.held():
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def run_pdf(bank_module, pdf_path, poppler_bin, pool=None, **kwargs):
+    if pool is not None:
+        return pool.run(bank_module, pdf_path, poppler_bin, **kwargs)
+    try:
+        df, metrics = run_job(bank_module, pdf_path, poppler_bin, kwargs, extraction.checkpoint_path())
+    except Exception as e:
+        return {'ok': False, 'df': None, 'metrics': None, 'error': 'exception', 'message': str(e)}
+    return {'ok': True, 'df': df, 'metrics': metrics, 'error': None, 'message': ''}
+
+
+def process_shard(root, shard, poppler_bin=None, pool=None):
+    """Parse every PDF in a shard and write its output partition"""
+    out_dir = os.path.join(root, 'output', f"shard={shard['id']}")
+    os.makedirs(out_dir, exist_ok=True)
+    results, frames = [], []
+    for pdf_path in shard['pdf_paths']:
+        result = run_pdf(shard['bank_module'], pdf_path, poppler_bin, pool, **shard['kwargs'])
+        metrics = [float(m) for m in result['metrics']] if result['ok'] and result['metrics'] is not None else None
+        parsed = result['ok'] and result['df'] is not None and not result['df'].empty
+        integrity = reconcile.check(canonical(result['df']))['score'] if parsed else None
+        results.append({'pdf_path': pdf_path, 'ok': result['ok'], 'metrics': metrics, 'integrity': integrity,
+                        'error': result['error'], 'message': result['message']})
+        if parsed:
+            frames.append(result['df'].assign(pdf_path=pdf_path))
+
+    _write_json(os.path.join(out_dir, 'metrics.json'), results)
+    if frames:
+        fmt = shard.get('output_format', 'csv')
+        tmp = os.path.join(out_dir, f"transactions.{uuid.uuid4().hex}.tmp")
+        # Each PDF's frame goes out as its own batch rather than through one concatenated copy
+        export.export(frames, fmt, tmp)
+        os.replace(tmp, os.path.join(out_dir, f"transactions.{export.FORMATS[fmt][0]}"))
+    return results
+
+
+def work(root, poppler_bin=None, pool=None, owner=None, lease_seconds=LEASE_SECONDS):
+    """Claim and process shards until none are left; safe to run on many hosts at once"""
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    manifest = _read_json(os.path.join(root, MANIFEST))
+    if manifest is None:
+        raise ValueError(f"No manifest found in {root}")
+
+    processed = 0
+    while True:
+        claimed = False
+        for shard in manifest['shards']:
+            done_path = os.path.join(root, 'done', f"{shard['id']}.done")
+            if os.path.exists(done_path):
+                continue
+            lease = Lease(root, shard['id'], owner, lease_seconds)
+            if not lease.acquire():
+                continue
+            claimed = True
+            try:
+                # Another host may have finished it between our check and our claim
+                if not os.path.exists(done_path):
+                    process_shard(root, shard, poppler_bin, pool)
+                    if lease.held():
+                        _write_json(done_path, {'owner': owner, 'finished': time.time()})
+                        processed += 1
+            finally:
+                lease.release()
+        if not claimed:
+            # Unfinished shards are leased by live hosts; wait in case a lease lapses
+            remaining = [s for s in manifest['shards']
+                         if not os.path.exists(os.path.join(root, 'done', f"{s['id']}.done"))]
+            if not remaining:
+                break
+            time.sleep(lease_seconds / 3)
+    return processed
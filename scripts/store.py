@@ -0,0 +1,184 @@
+import sqlite3
+import time
+import pandas as pd
+from scripts.normalize import canonical, row_hashes
+from scripts import cube, search
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY,
+    bank TEXT NOT NULL,
+    account TEXT NOT NULL,
+    source TEXT,
+    period_from TEXT,
+    period_to TEXT,
+    rows INTEGER NOT NULL,
+    total_debit REAL,
+    total_credit REAL,
+    opening_bal REAL,
+    closing_bal REAL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    statement_id INTEGER NOT NULL REFERENCES statements(id),
+    bank TEXT NOT NULL,
+    account TEXT NOT NULL,
+    month TEXT,
+    seq INTEGER NOT NULL,
+    date TEXT,
+    narration TEXT,
+    debit REAL NOT NULL,
+    credit REAL NOT NULL,
+    amount REAL NOT NULL,
+    balance REAL,
+    row_hash INTEGER
+);
+CREATE INDEX IF NOT EXISTS txn_partition ON transactions (bank, account, month);
+CREATE INDEX IF NOT EXISTS txn_account_date ON transactions (account, date);
+CREATE INDEX IF NOT EXISTS txn_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS txn_amount ON transactions (amount);
+CREATE INDEX IF NOT EXISTS stmt_account ON statements (account);
+"""
+
+TXN_COLUMNS = ['statement_id', 'bank', 'account', 'month', 'seq', 'date', 'narration',
+               'debit', 'credit', 'amount', 'balance', 'row_hash']
+
+
+def financial_year(fy):
+    """Indian financial year bounds: FY24 runs 2023-04-01 to 2024-03-31"""
+    fy = int(fy)
+    fy = fy + 2000 if fy < 100 else fy
+    return f"{fy - 1}-04-01", f"{fy}-03-31"
+
+
+def to_rows(txns, statement_id, bank, account):
+    """Turn a canonical frame into insert tuples without a per-row Python loop over pandas"""
+    dates = txns['date']
+    frame = pd.DataFrame({
+        'statement_id': statement_id,
+        'bank': bank,
+        'account': account,
+        'month': dates.dt.strftime('%Y-%m'),
+        'seq': range(len(txns)),
+        'date': dates.dt.strftime('%Y-%m-%d'),
+        'narration': txns['narration'],
+        'debit': txns['debit'],
+        'credit': txns['credit'],
+        'amount': txns['credit'] - txns['debit'],
+        'balance': txns['balance'],
+        'row_hash': txns['row_hash'] if 'row_hash' in txns else row_hashes(txns),
+    })
+    frame = frame.astype(object).where(frame.notna(), None)
+    return list(frame.itertuples(index=False, name=None))
+
+
+class TransactionStore:
+    """Parsed statements and their transactions in one SQLite file
+
+    Rows are keyed by bank, account and month (the partition index) and
+    indexed on account+date, date and signed amount for report queries.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Stores created before overlap deduplication have no row_hash column
+        if 'row_hash' not in [row[1] for row in self.conn.execute("PRAGMA table_info(transactions)")]:
+            self.conn.execute("ALTER TABLE transactions ADD COLUMN row_hash INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS txn_hash ON transactions (account, row_hash)")
+        self.indexed = search.ensure_index(self.conn)
+        self.conn.executescript(cube.SCHEMA)
+        if (self.conn.execute("SELECT NOT EXISTS (SELECT 1 FROM cube)").fetchone()[0]
+                and self.conn.execute("SELECT EXISTS (SELECT 1 FROM transactions)").fetchone()[0]):
+            cube.rebuild(self.conn)
+
+    def add_statement(self, bank, account, std_df, metrics=None, source=None, period=(None, None)):
+        """Bulk-append one parsed statement; returns its statement id"""
+        return self.add_transactions(bank, account, canonical(std_df), metrics, source, period)
+
+    def add_transactions(self, bank, account, txns, metrics=None, source=None, period=(None, None)):
+        """Bulk-append rows already in canonical form (see normalize.canonical)"""
+        opening_bal, closing_bal = (float(metrics[2]), float(metrics[3])) if metrics is not None else (None, None)
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO statements (bank, account, source, period_from, period_to, rows, "
+                "total_debit, total_credit, opening_bal, closing_bal, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (bank, account, source, period[0], period[1], len(txns),
+                 float(txns['debit'].sum()), float(txns['credit'].sum()),
+                 opening_bal, closing_bal, time.time()))
+            statement_id = cur.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO transactions ({', '.join(TXN_COLUMNS)}) VALUES ({', '.join('?' * len(TXN_COLUMNS))})",
+                to_rows(txns, statement_id, bank, account))
+            if self.indexed:
+                search.index_statement(self.conn, statement_id)
+            cube.upsert(self.conn, bank, account, cube.build(txns))
+        return statement_id
+
+    def query(self, account=None, bank=None, start=None, end=None, fy=None,
+              min_amount=None, max_amount=None, columns=None, statement_id=None, chunksize=None):
+        """Transactions matching the filters, in date order; dates are inclusive ISO strings
+
+        With chunksize, an iterator of frames of that many rows instead, so
+        exports can stream a large history without loading it at once.
+        """
+        if fy is not None:
+            start, end = financial_year(fy)
+        clauses, params = [], []
+        for sql, value in (("account = ?", account), ("bank = ?", bank),
+                           ("date >= ?", start), ("date <= ?", end),
+                           ("amount >= ?", min_amount), ("amount <= ?", max_amount),
+                           ("statement_id = ?", statement_id)):
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cols = ', '.join(columns) if columns else '*'
+        return pd.read_sql_query(
+            f"SELECT {cols} FROM transactions {where} ORDER BY account, date, statement_id, seq",
+            self.conn, params=params, chunksize=chunksize)
+
+    def search(self, text, bank=None, account=None, start=None, end=None, fy=None,
+               min_amount=None, max_amount=None, limit=1000):
+        """Transactions whose narration contains text, e.g. a UPI handle or cheque number"""
+        if fy is not None:
+            start, end = financial_year(fy)
+        return search.search(self.conn, text, bank, account, start, end,
+                             min_amount, max_amount, limit, self.indexed)
+
+    def aggregates(self, account=None, bank=None, start_month=None, end_month=None, by=('month',)):
+        """Totals from the month x channel x counterparty cube, rolled up to the by columns"""
+        clauses, params = [], []
+        for sql, value in (("account = ?", account), ("bank = ?", bank),
+                           ("month >= ?", start_month), ("month <= ?", end_month)):
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        keys = ', '.join(by)
+        sums = ', '.join(f"SUM({m}) AS {m}" for m in cube.MEASURES)
+        return pd.read_sql_query(
+            f"SELECT {keys}, {sums} FROM cube {where} GROUP BY {keys} ORDER BY {keys}", self.conn, params=params)
+
+    def top_counterparties(self, account, direction='debit', limit=10, start_month=None, end_month=None):
+        """Largest counterparties by total paid (debit) or received (credit)"""
+        table = self.aggregates(account, start_month=start_month, end_month=end_month, by=('counterparty', 'channel'))
+        return table.sort_values(f"{direction}_total", ascending=False).head(limit).reset_index(drop=True)
+
+    def statements(self, account=None):
+        if account is None:
+            return pd.read_sql_query("SELECT * FROM statements ORDER BY id", self.conn)
+        return pd.read_sql_query("SELECT * FROM statements WHERE account = ? ORDER BY id",
+                                 self.conn, params=[account])
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
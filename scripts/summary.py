@@ -0,0 +1,73 @@
+import re
+import fitz
+
+AMOUNT = r'(?:rs\.?|inr|₹)?\s*(-?[\d,]+\.\d{1,2})'
+NUMBER = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+
+DEFAULT_PATTERNS = {
+    'opening': r'opening\s*bal(?:ance)?\s*[:\-]?\s*' + AMOUNT,
+    'debits': r'(?:total\s*)?(?:debits?|withdrawa?ls?)(?:\s*amount)?\s*[:\-]?\s*' + AMOUNT,
+    'credits': r'(?:total\s*)?(?:credits?|deposits?)(?:\s*amount)?\s*[:\-]?\s*' + AMOUNT,
+    'closing': r'closing\s*bal(?:ance)?\s*[:\-]?\s*' + AMOUNT,
+}
+
+# Last two pages first, where summaries are printed, then the cover page
+DEFAULT_PAGES = (-1, -2, 0)
+
+
+def to_float(value):
+    return float(str(value).replace(',', ''))
+
+
+def match_patterns(text, patterns, found):
+    for key, pattern in patterns.items():
+        if key in found:
+            continue
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            found[key] = to_float(match.group(1))
+    return found
+
+
+def match_block(text, marker, labels):
+    """Read a labels-then-values block such as HDFC's STATEMENT SUMMARY"""
+    start = text.lower().find(marker.lower())
+    if start < 0:
+        return None
+    numbers = NUMBER.findall(text[start + len(marker):])
+    if len(numbers) < len(labels):
+        return None
+    return {label: to_float(num) for label, num in zip(labels, numbers) if label}
+
+
+def reconciles(found, tolerance=1.0):
+    # Guards against a stray regex hit being passed off as the printed summary
+    return abs(found['opening'] - found['debits'] + found['credits'] - found['closing']) <= tolerance
+
+
+def find_summary(pdf_path, patterns=None, block=None, pages=DEFAULT_PAGES):
+    """Look for printed opening/debit/credit/closing totals on the given pages only"""
+    patterns = DEFAULT_PATTERNS if patterns is None else patterns
+    found = {}
+    doc = fitz.open(pdf_path)
+    try:
+        seen = set()
+        for page_no in pages:
+            if not len(doc):
+                break
+            page_no = page_no % len(doc)
+            if page_no in seen:
+                continue
+            seen.add(page_no)
+            text = doc.load_page(page_no).get_text()
+            if block:
+                from_block = match_block(text, *block)
+                if from_block and reconciles(from_block):
+                    return from_block
+            # Opening and closing lines are often printed on different pages
+            found = match_patterns(text, patterns, found)
+            if patterns and len(found) == len(patterns):
+                return found if reconciles(found) else None
+    finally:
+        doc.close()
+    return None
@@ -0,0 +1,126 @@
+import os
+import time
+import fitz
+from scripts.ocr import MIN_TEXT_CHARS
+
+MAX_BYTES = 100 * 1024 * 1024
+MAX_PAGES = 5000
+SAMPLE_PAGES = 5
+
+# Straight line segments on a page above which it holds a ruled table
+MIN_RULES_PER_PAGE = 6
+
+# Fraction of sampled pages without a text layer that sends the file to OCR
+SCANNED_RATIO = 0.5
+
+SCANNER_PRODUCERS = ('scan', 'naps2', 'canon', 'epson', 'xerox', 'ricoh', 'kyocera', 'camscanner')
+
+ROUTES = ('text', 'tables', 'ocr', 'reject')
+
+
+def sample_pages(page_count, n=SAMPLE_PAGES):
+    if page_count <= n:
+        return list(range(page_count))
+    step = (page_count - 1) / (n - 1)
+    return sorted({round(i * step) for i in range(n)})
+
+
+def count_rules(page):
+    """Count horizontal/vertical vector strokes, the signature of a ruled table
+
+    Only axis-aligned line segments and thin rectangles count; a wider
+    rectangle is a filled box (a logo, a shaded header) rather than a rule.
+    """
+    rules = 0
+    for path in page.get_drawings():
+        for item in path['items']:
+            if item[0] == 'l':
+                p1, p2 = item[1], item[2]
+                if abs(p1.x - p2.x) < 1 or abs(p1.y - p2.y) < 1:
+                    rules += 1
+            elif item[0] == 're':
+                # Thin filled rectangles are how many generators draw table rules
+                if min(item[1].width, item[1].height) < 2:
+                    rules += 1
+    return rules
+
+
+def triage(pdf_path, max_bytes=MAX_BYTES, max_pages=MAX_PAGES):
+    """Inspect a PDF cheaply and pick the fastest extraction route for it
+
+    Returns a dict with the chosen 'route' (one of ROUTES), the 'reason',
+    the measurements behind it and 'elapsed_ms' spent deciding.
+    """
+    start = time.perf_counter()
+    decision = {
+        'route': None,
+        'reason': '',
+        'bytes': 0,
+        'pages': 0,
+        'encrypted': False,
+        'producer': '',
+        'chars_per_page': 0.0,
+        'scanned_ratio': 0.0,
+        'ruled_ratio': 0.0,
+        'elapsed_ms': 0.0,
+    }
+
+    def decide(route, reason):
+        decision['route'] = route
+        decision['reason'] = reason
+        decision['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return decision
+
+    try:
+        decision['bytes'] = os.path.getsize(pdf_path)
+    except OSError as e:
+        return decide('reject', f"unreadable file: {e}")
+    if decision['bytes'] > max_bytes:
+        return decide('reject', f"file larger than {max_bytes} bytes")
+
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        return decide('reject', f"malformed PDF: {e}")
+
+    try:
+        decision['encrypted'] = bool(doc.is_encrypted)
+        if doc.needs_pass:
+            return decide('reject', "password protected")
+
+        decision['pages'] = len(doc)
+        if decision['pages'] == 0:
+            return decide('reject', "no pages")
+        if decision['pages'] > max_pages:
+            return decide('reject', f"more than {max_pages} pages")
+
+        metadata = doc.metadata or {}
+        decision['producer'] = f"{metadata.get('producer') or ''} {metadata.get('creator') or ''}".strip()
+
+        chars, scanned, ruled = 0, 0, 0
+        sampled = sample_pages(decision['pages'])
+        for page_no in sampled:
+            page = doc.load_page(page_no)
+            n = len(page.get_text().strip())
+            chars += n
+            if n < MIN_TEXT_CHARS:
+                scanned += 1
+            elif count_rules(page) >= MIN_RULES_PER_PAGE:
+                ruled += 1
+    except Exception as e:
+        return decide('reject', f"malformed PDF: {e}")
+    finally:
+        doc.close()
+
+    text_pages = len(sampled) - scanned
+    decision['chars_per_page'] = round(chars / len(sampled), 1)
+    decision['scanned_ratio'] = round(scanned / len(sampled), 2)
+    decision['ruled_ratio'] = round(ruled / text_pages, 2) if text_pages else 0.0
+
+    from_scanner = any(tok in decision['producer'].lower() for tok in SCANNER_PRODUCERS)
+    if decision['scanned_ratio'] >= SCANNED_RATIO or (from_scanner and scanned):
+        return decide('ocr', "pages without a text layer")
+    # Cover and disclaimer pages are unruled, so one ruled page is enough
+    if ruled:
+        return decide('tables', "ruled tables")
+    return decide('text', "text layer without table rules")
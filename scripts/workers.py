@@ -0,0 +1,334 @@
+import atexit
+import glob
+import importlib
+import inspect
+import multiprocessing as mp
+import multiprocessing.util
+import os
+import queue
+import signal
+import tempfile
+import time
+import traceback
+import uuid
+import weakref
+from scripts import extraction, fingerprint
+from scripts.account_info import extract_account_info
+from scripts.normalize import canonical
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+DEFAULT_TIMEOUT = 120          # seconds of wall clock per job
+DEFAULT_MAX_RSS_MB = 2048      # resident memory per worker, its OCR processes included
+DEFAULT_MAX_JOBS = 50          # jobs before a worker is recycled anyway
+POLL_INTERVAL = 0.2
+SHARED_MIN_ROWS = 2000         # below this a frame pickles faster than it maps
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+# spawn rather than fork: the app process has threads and fitz state we must not clone
+_ctx = mp.get_context('spawn')
+
+# Workers are not daemons (OCR starts its own process pool inside them), so
+# the interpreter would wait on them at exit; they are stopped here instead.
+# multiprocessing.util is imported above so its own exit hook, which joins
+# them, is registered first and runs after this one
+_workers = weakref.WeakSet()
+
+
+@atexit.register
+def _stop_workers():
+    for worker in list(_workers):
+        worker.stop()
+
+
+def publish(df, directory=SHARED_DIR):
+    """Write df to an Arrow IPC file in shared memory and return its descriptor
+
+    Returns None when the frame should be pickled instead: pyarrow missing,
+    a small frame, columns Arrow cannot type (mixed object columns,
+    duplicate names) or no room to write.
+    """
+    if pa is None or df is None or len(df) < SHARED_MIN_ROWS:
+        return None
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowException, ValueError, TypeError):
+        return None
+    path = os.path.join(directory, f"pdfparser-{os.getpid()}-{uuid.uuid4().hex}.arrow")
+    try:
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    except OSError:
+        discard(path)
+        return None
+    return {'path': path, 'rows': table.num_rows, 'bytes': os.path.getsize(path)}
+
+
+def attach(descriptor):
+    """Map a published frame without copying it
+
+    The file is unlinked straight away; its pages stay mapped for as long
+    as the frame's columns reference them.
+    """
+    try:
+        table = pa.ipc.open_file(pa.memory_map(descriptor['path'])).read_all()
+    finally:
+        discard(descriptor['path'])
+    return table.to_pandas()
+
+
+def discard(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def rows_signature(df):
+    """Duplicate-detection signature over the parsed rows, or None; never fails the job"""
+    if df is None or df.empty:
+        return None
+    try:
+        return fingerprint.rows_signature(canonical(df))
+    except Exception:
+        return None
+
+
+def run_job(module_name, pdf_path, poppler_bin, kwargs, checkpoint_dir=None):
+    """module_name's run(), resumable through page journals in checkpoint_dir where run() takes one
+
+    The journals are only removed once run() returns, so a job killed at
+    its deadline, even after extraction finished, resumes on retry.
+    """
+    module = importlib.import_module(module_name)
+    if checkpoint_dir and 'checkpoint_dir' in inspect.signature(module.run).parameters:
+        kwargs = {'checkpoint_dir': checkpoint_dir, **kwargs}
+    df, metrics = module.run(pdf_path, poppler_bin, **kwargs)
+    extraction.clear_checkpoints(kwargs.get('checkpoint_dir'), pdf_path)
+    return df, metrics
+
+
+def _do(job):
+    if 'call' in job:
+        return {'ok': True, 'value': job['call'](*job['args'])}
+    # First-page details are read here too, so the app process never opens the PDF
+    account = extract_account_info(job['pdf_path']) if job['account'] else None
+    df, metrics = run_job(job['module'], job['pdf_path'], job['poppler_bin'], job['kwargs'], job['checkpoint_dir'])
+    # A large frame goes back as a descriptor of shared memory rather than a pickle
+    descriptor = publish(df) if job['shared'] else None
+    return {'ok': True, 'df': None if descriptor else df, 'shared': descriptor, 'metrics': metrics,
+            'signature': rows_signature(df), 'account': account}
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        try:
+            conn.send(_do(job))
+        except MemoryError:
+            conn.send({'ok': False, 'error': 'memory', 'message': "worker ran out of memory"})
+        except Exception as e:
+            conn.send({'ok': False, 'error': 'exception', 'message': str(e),
+                       'traceback': traceback.format_exc()})
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, or None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def descendants(pid):
+    """Pids of a process's children, their children and so on; empty where /proc is unavailable"""
+    found, stack = [], [pid]
+    while stack:
+        parent = stack.pop()
+        try:
+            tasks = os.listdir(f'/proc/{parent}/task')
+        except OSError:
+            continue
+        for tid in tasks:
+            try:
+                with open(f'/proc/{parent}/task/{tid}/children') as f:
+                    children = [int(child) for child in f.read().split()]
+            except OSError:
+                continue
+            found += children
+            stack += children
+    return found
+
+
+def tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants in MB, or None where /proc is unavailable"""
+    own = rss_mb(pid)
+    if own is None:
+        return None
+    return own + sum(rss_mb(child) or 0 for child in descendants(pid))
+
+
+class Worker:
+    def __init__(self):
+        self.conn, child_conn = _ctx.Pipe()
+        self.process = _ctx.Process(target=_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        _workers.add(self)
+
+    def exit_message(self):
+        self.process.join(1)
+        return f"worker exited with code {self.process.exitcode}"
+
+    def kill(self):
+        # Children first: once the worker is gone they are reparented and out of reach
+        for child in descendants(self.process.pid):
+            try:
+                os.kill(child, signal.SIGKILL)
+            except OSError:
+                pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.conn.close()
+        _workers.discard(self)
+        # A worker stopped mid-job may have published a result nobody will attach
+        for path in glob.glob(os.path.join(SHARED_DIR, f"pdfparser-{self.process.pid}-*.arrow")):
+            discard(path)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(2)
+        except (OSError, ValueError):
+            pass
+        self.kill()
+
+
+def failure(error, message, started):
+    return {'ok': False, 'df': None, 'metrics': None, 'signature': None, 'account': None, 'value': None,
+            'error': error, 'message': message, 'elapsed': round(time.monotonic() - started, 3)}
+
+
+class WorkerPool:
+    """Runs bank parsers in separate processes with deadlines and memory limits
+
+    A job that times out, exceeds max_rss_mb (counted over the worker and
+    any processes it started) or crashes its worker comes back as
+    {'ok': False, 'error': ..., 'message': ...} and the worker is replaced,
+    its whole process tree killed.
+    Successful jobs return {'ok': True, 'df': ..., 'metrics': ..., 'signature': ...,
+    'account': ...}, signature being fingerprint.rows_signature of the
+    parsed rows and account the first page's details when asked for. With
+    shared (the default when pyarrow is installed) large frames come back
+    through shared memory instead of the pipe. call() runs any other
+    module-level function under the same limits.
+
+    Parsers that take a checkpoint_dir journal their pages under the pool's
+    (extraction.checkpoint_path), so a job killed at its deadline and run
+    again resumes where it stopped.
+    """
+
+    def __init__(self, size=2, timeout=DEFAULT_TIMEOUT, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 max_jobs_per_worker=DEFAULT_MAX_JOBS, shared=True, checkpoint_dir=None):
+        self.timeout = timeout
+        self.checkpoint_dir = extraction.checkpoint_path(checkpoint_dir)
+        self.shared = shared and pa is not None
+        self.max_rss_mb = max_rss_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(Worker())
+
+    def run(self, module_name, pdf_path, poppler_bin=None, timeout=None, account=False, **kwargs):
+        """Parse a PDF with module_name's run(); account=True also reads extract_account_info"""
+        return self._submit({'module': module_name, 'pdf_path': pdf_path, 'poppler_bin': poppler_bin,
+                             'kwargs': kwargs, 'shared': self.shared, 'account': account,
+                             'checkpoint_dir': self.checkpoint_dir}, timeout)
+
+    def call(self, function, *args, timeout=None):
+        """function(*args) in a worker; the result's 'value' holds what it returned"""
+        return self._submit({'call': function, 'args': args}, timeout)
+
+    def _submit(self, job, timeout):
+        worker = self.idle.get()
+        try:
+            result = self._run_on(worker, job, timeout or self.timeout)
+        except BaseException:
+            worker.kill()
+            self.idle.put(Worker())
+            raise
+        if result['error'] in ('timeout', 'memory', 'crashed') or worker.jobs >= self.max_jobs_per_worker:
+            worker.kill()
+            worker = Worker()
+        self.idle.put(worker)
+        return result
+
+    def _run_on(self, worker, job, timeout):
+        started = time.monotonic()
+        deadline = started + timeout
+        try:
+            worker.conn.send(job)
+        except (OSError, ValueError) as e:
+            return failure('crashed', f"worker unavailable: {e}", started)
+        worker.jobs += 1
+
+        while True:
+            if worker.conn.poll(POLL_INTERVAL):
+                try:
+                    result = worker.conn.recv()
+                except (EOFError, OSError):
+                    return failure('crashed', worker.exit_message(), started)
+                descriptor = result.pop('shared', None)
+                if descriptor is not None:
+                    try:
+                        result['df'] = attach(descriptor)
+                    except (OSError, pa.ArrowException) as e:
+                        return failure('exception', f"could not map worker result: {e}", started)
+                result.setdefault('df', None)
+                result.setdefault('metrics', None)
+                result.setdefault('signature', None)
+                result.setdefault('account', None)
+                result.setdefault('value', None)
+                result.setdefault('error', None)
+                result.setdefault('message', '')
+                result['elapsed'] = round(time.monotonic() - started, 3)
+                return result
+            if not worker.process.is_alive():
+                return failure('crashed', worker.exit_message(), started)
+            if time.monotonic() > deadline:
+                return failure('timeout', f"no result after {timeout}s", started)
+            rss = tree_rss_mb(worker.process.pid)
+            if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+                return failure('memory', f"worker used {rss:.0f} MB (limit {self.max_rss_mb} MB)", started)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,27 @@
+import fitz
+from scripts.account_info import extract_account_info, parse_account_info
+
+COVER = """Account Holders Name : TEST USER
+Account Number : 1234 5678 9012
+IFSC : SBIN0001234
+Statement Period From 01/01/2024 to 31/03/2024
+Opening Balance : Rs. 1,000.50
+Closing Balance : INR 2,500.00"""
+
+
+def test_labels_are_read_from_text():
+    assert parse_account_info(COVER) == {
+        'name': 'TEST USER', 'account_no': '123456789012', 'ifsc': 'SBIN0001234',
+        'period_from': '01/01/2024', 'period_to': '31/03/2024', 'opening_bal': 1000.5, 'closing_bal': 2500.0}
+    assert set(parse_account_info('nothing here').values()) == {None}
+
+
+def test_first_page_text_layer(tmp_path):
+    path = str(tmp_path / 'a.pdf')
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 72), COVER, fontsize=10)
+    doc.new_page().insert_text((50, 72), "Account Number : 999999999999", fontsize=10)
+    doc.save(path)
+    doc.close()
+    info = extract_account_info(path)
+    assert info['account_no'] == '123456789012' and info['closing_bal'] == 2500.0
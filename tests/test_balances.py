@@ -0,0 +1,36 @@
+import pandas as pd
+from scripts import balances
+from scripts.normalize import canonical
+
+
+def statement(**columns):
+    return pd.DataFrame({
+        'date': ['01/01/2024', '03/01/2024', '06/01/2024'],
+        'description': ['SALARY', 'RENT', 'UPI'],
+        'debit': ['', '400.00', '100.00'],
+        'credit': ['1,000.00', '', ''],
+        **columns,
+    })
+
+
+def test_no_balance_column_is_rebuilt_from_opening():
+    txns = canonical(statement())
+    assert txns['balance'].isna().all()
+    result = balances.balance_metrics(txns, days=(5,), opening=500.0)
+    assert result['days'] == 6
+    assert result['min_balance'] == 1000.0
+    assert result['abb'] == 1100.0          # 5 January, after the rent
+    assert result['negative_days'] == 0
+
+
+def test_no_balance_and_no_opening_gives_no_figures():
+    result = balances.balance_metrics(canonical(statement()))
+    assert result['days'] == 0 and result['abb'] is None
+
+
+def test_placeholder_zero_balances_are_not_real_balances():
+    # standardize() writes '0' where the statement printed no balance
+    txns = canonical(statement(balance=['1,500.00', '0', '1,000.00']))
+    daily = balances.daily_balances(txns)
+    assert daily.min() == 1000.0
+    assert daily[pd.Timestamp('2024-01-03')] == 1500.0
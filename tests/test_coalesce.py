@@ -0,0 +1,28 @@
+import pandas as pd
+from scripts import coalesce
+
+
+def test_wrapped_narrations_join_their_transaction():
+    df = pd.DataFrame({
+        'date': ['Opening', '01/01/2024', '', '', '02/01/2024', '', '03/01/2024'],
+        'narration': ['balance', 'UPI/DR/123456789012', 'SHOP NAME', 'YESB', 'NEFT CR', None, 'CHQ DEP'],
+        'debit': ['', '100.00', '', '', '', '', '0'],
+        'credit': ['', '', '', '', '500.00', '', '200.00'],
+        'balance': ['', '900.00', '', '', '1,400.00', '', '1,600.00'],
+    })
+    out = coalesce.rows(df, 'date', ['narration'], ['debit', 'credit'])
+    assert out['narration'].tolist() == ['balance', 'UPI/DR/123456789012 SHOP NAME YESB', 'NEFT CR', 'CHQ DEP']
+    assert out['balance'].tolist() == ['', '900.00', '1,400.00', '1,600.00']
+
+
+def test_rows_without_continuations_are_left_alone():
+    df = pd.DataFrame({'date': ['01/01/2024', '02/01/2024'], 'narration': ['A', 'B'],
+                       'debit': ['1.00', ''], 'credit': ['', '2.00']})
+    assert coalesce.rows(df, 'date', ['narration'], ['debit', 'credit']).equals(df)
+
+
+def test_amount_only_row_starts_a_transaction():
+    df = pd.DataFrame({'date': ['01/01/2024', '', ''], 'narration': ['SALARY', 'CHARGES', 'GST'],
+                       'debit': ['', '0', '18.00'], 'credit': ['1,000.00', '', '']})
+    out = coalesce.rows(df, 'date', ['narration'], ['debit', 'credit'])
+    assert out['narration'].tolist() == ['SALARY CHARGES', 'GST']
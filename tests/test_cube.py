@@ -0,0 +1,38 @@
+import pandas as pd
+from scripts import cube
+from scripts.store import TransactionStore
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['date', 'narration', 'debit', 'credit', 'balance'])
+
+
+JAN = frame([('02/01/2024', 'ATM WDL 1234 MUMBAI', '2,000.00', '', ''),
+             ('05/01/2024', 'ACH D- BAJAJ FINANCE LTD-ABC12345', '12,000.00', '', ''),
+             ('20/01/2024', 'CASH DEPOSIT BRANCH', '', '5,000.00', '')])
+FEB = frame([('05/02/2024', 'ACH D- BAJAJ FINANCE LTD-ABC12345', '12,000.00', '', ''),
+             ('06/02/2024', 'ATM WDL 1234 MUMBAI', '500.00', '', '')])
+
+
+def test_cube_follows_every_stored_statement(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        store.add_statement('sbi', '1', JAN)
+        store.add_statement('sbi', '1', FEB)
+        monthly = store.aggregates('1').set_index('month')
+        assert monthly.loc['2024-01', 'debit_total'] == 14000.0
+        assert monthly.loc['2024-01', 'cash_deposit'] == 5000.0
+        assert monthly.loc['2024-02', 'cash_withdrawal'] == 500.0
+        by_channel = store.aggregates('1', by=('channel',)).set_index('channel')
+        assert by_channel.loc['NACH', 'debit_count'] == 2
+        top = store.top_counterparties('1')
+        assert top.iloc[0]['debit_total'] == 24000.0 and top.iloc[0]['channel'] == 'NACH'
+
+
+def test_rebuild_matches_incremental_upserts(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        store.add_statement('sbi', '1', JAN)
+        store.add_statement('sbi', '1', FEB)
+        store.add_statement('hdfc', '2', FEB)
+        incremental = store.aggregates(by=('month', 'channel', 'counterparty'))
+        cube.rebuild(store.conn)
+        assert store.aggregates(by=('month', 'channel', 'counterparty')).equals(incremental)
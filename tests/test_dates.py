@@ -0,0 +1,16 @@
+import pandas as pd
+from scripts import dates
+
+
+def test_formats_then_dayfirst_fallback():
+    parsed = dates.parse(pd.Series(['01/02/2024', '01/02/2024 10:15:00', '15-Mar-2024', 'junk', None]),
+                         ('%d/%m/%Y',))
+    assert parsed.tolist()[:3] == [pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-01 10:15'),
+                                   pd.Timestamp('2024-03-15')]
+    assert parsed[3:].isna().all()
+
+
+def test_parse_column_keeps_strings_when_nothing_parses():
+    column = pd.Series(['Opening', 'Closing'])
+    assert dates.parse_column(column, ('%d/%m/%Y',)).tolist() == ['Opening', 'Closing']
+    assert pd.api.types.is_datetime64_any_dtype(dates.parse_column(pd.Series(['02/01/2024', 'x'])))
@@ -0,0 +1,36 @@
+import io
+import pandas as pd
+import pytest
+from scripts import export
+
+pa = pytest.importorskip('pyarrow')
+
+
+def read_back(raw, fmt):
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(raw))
+    return pa.ipc.open_file(pa.py_buffer(raw)).read_all().to_pandas()
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_mixed_type_batches_are_unified(fmt):
+    # First PDF has no cheque numbers at all and printed no balances; the second has both as text
+    first = pd.DataFrame({'chq': [None, None], 'balance': [1.0, 2.0], 'amount': [1, 2]})
+    second = pd.DataFrame({'chq': ['001', '002'], 'balance': ['3', '4 Dr'], 'amount': [1.5, None]})
+    out = read_back(export.to_bytes([first, second], fmt), fmt)
+    assert len(out) == 4
+    assert out['chq'].tolist()[2:] == ['001', '002']
+    assert out['balance'].tolist() == ['1', '2', '3', '4 Dr']
+    assert out['amount'].tolist()[:3] == [1.0, 2.0, 1.5]
+
+
+def test_stream_reads_all_none_first_column_as_text():
+    first = pd.DataFrame({'chq': [None, None], 'amount': [1.0, 2.0]})
+    second = pd.DataFrame({'chq': ['001', '002'], 'amount': [3.0, 4.0]})
+    out = read_back(export.to_bytes(iter([first, second]), 'parquet'), 'parquet')
+    assert out['chq'].tolist()[2:] == ['001', '002']
+
+
+def test_csv_writes_one_header():
+    frames = [pd.DataFrame({'a': [1]}), pd.DataFrame({'a': [2]})]
+    assert export.to_bytes(frames, 'csv').decode().splitlines() == ['a', '1', '2']
@@ -0,0 +1,39 @@
+import fitz
+from scripts import extraction, pagecache
+
+
+def test_checkpoint_is_keyed_on_profile(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(pdf)
+    doc.close()
+    lines = pagecache.profile('tables', 'lines', ('date',), ())
+    first = extraction.Checkpoint(tmp_path / 'cp', pdf, lines)
+    first.save(0, [[['01/01/2024', 'SALARY']]])
+    first.close()
+
+    assert extraction.Checkpoint(tmp_path / 'cp', pdf, lines).pages == {0: [[['01/01/2024', 'SALARY']]]}
+    for other in (pagecache.profile('tables', 'text', ('date',), ()),
+                  pagecache.profile('tables', 'lines', ('txn date',), ()),
+                  pagecache.profile('text', None, ('date',), ())):
+        checkpoint = extraction.Checkpoint(tmp_path / 'cp', pdf, other)
+        assert checkpoint.pages == {}
+        checkpoint.close()
+
+
+def test_select_pages_skips_cover_and_stops_at_end_marker(tmp_path):
+    doc = fitz.open()
+    for text in ("Welcome to your bank. Important notices and terms apply to all accounts.",
+                 "Date Narration Debit Credit Balance\n01/01/2024 UPI/SHOP 100.00 900.00",
+                 "02/01/2024 NEFT 50.00 850.00\nClosing balance 850.00 end of statement here",
+                 "03/01/2024 Disclaimer page that still carries a date for some reason"):
+        doc.new_page().insert_text((50, 72), text, fontsize=9)
+    doc.new_page()
+    selected, scanned = extraction.select_pages(doc, ('narration',), ('closing balance',))
+    # The blank page after the end marker is never reached, so nothing is sent to OCR
+    assert sorted(selected) == [1, 2] and scanned == []
+    # Markers that match nothing do not describe this layout: every dated page is read
+    selected, scanned = extraction.select_pages(doc, ('txn remarks',), ())
+    assert sorted(selected) == [1, 2, 3] and scanned == [4]
+    doc.close()
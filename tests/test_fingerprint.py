@@ -0,0 +1,45 @@
+import fitz
+import pandas as pd
+from scripts.fingerprint import FingerprintIndex, rows_signature
+from scripts.normalize import canonical
+
+
+def statement(start, end):
+    days = pd.date_range('2024-01-01', '2024-06-30', freq='D')
+    full = pd.DataFrame({'date': days.strftime('%d/%m/%Y'), 'narration': 'UPI/SHOP',
+                         'debit': '', 'credit': [f'{10 + i % 7}.00' for i in range(len(days))]})
+    full['balance'] = (1000 + full['credit'].astype(float).cumsum()).map('{:.2f}'.format)
+    return canonical(full[(days >= start) & (days <= end)].reset_index(drop=True))
+
+
+def pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_parsed_rows_decide_near_duplicates(tmp_path):
+    with FingerprintIndex(str(tmp_path / 'f.db')) as index:
+        index.add('a' * 64, source='jan-mar.pdf', statement_id=1,
+                  rows_signature=rows_signature(statement('2024-01-01', '2024-03-31')))
+        # The same rows rendered again: a different file, the same statement
+        rerender = index.confirm(rows_signature(statement('2024-01-01', '2024-03-31')))
+        assert [m['source'] for m in rerender] == ['jan-mar.pdf']
+        assert rerender[0]['similarity'] == 1.0
+        # A cumulative Jan-Jun statement repeats Jan-Mar but is not a copy of it
+        assert index.confirm(rows_signature(statement('2024-01-01', '2024-06-30'))) == []
+        assert index.confirm(rows_signature(statement('2024-04-01', '2024-06-30'))) == []
+        assert index.confirm(None) == []
+
+
+def test_check_answers_exact_copies_from_the_file_hash(tmp_path):
+    first = pdf(tmp_path / 'a.pdf', 'Statement 01/01/2024 1,000.00 2,000.00 3,000.00 4,000.00')
+    with FingerprintIndex(str(tmp_path / 'f.db')) as index:
+        seen = index.check(first)
+        assert seen['exact'] is None
+        index.add(seen['sha256'], seen['signature'], 'a.pdf', 7)
+        again = index.check(first)
+    assert again['exact'] == {'sha256': seen['sha256'], 'source': 'a.pdf', 'statement_id': 7}
+    assert again['signature'] is None
@@ -0,0 +1,72 @@
+import fitz
+from scripts import jobqueue
+from scripts.jobqueue import BULK, INTERACTIVE, JobQueue
+
+
+def pdf(path, pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_claim_order_is_priority_then_pages(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.db'))
+    big, small, upload = (pdf(tmp_path / f'{name}.pdf', pages)
+                          for name, pages in (('big', 9), ('small', 2), ('upload', 30)))
+    queue.enqueue(big, 'scripts.script_sbi', BULK)
+    queue.enqueue(small, 'scripts.script_sbi', BULK)
+    queue.enqueue(upload, 'scripts.script_sbi', INTERACTIVE)
+    assert not queue.enqueue(small, 'scripts.script_sbi', BULK)
+    order = [queue.claim()['pdf_path'] for _ in range(3)]
+    assert order == [upload, small, big]
+    assert queue.claim() is None
+
+
+def test_failed_jobs_back_off_then_fail(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(jobqueue.time, 'time', lambda: clock[0])
+    queue = JobQueue(str(tmp_path / 'q.db'))
+    queue.enqueue(pdf(tmp_path / 'a.pdf', 1), 'scripts.script_sbi', max_attempts=2)
+
+    job = queue.claim()
+    queue.fail(job['id'], 'timeout: no result')
+    assert queue.claim() is None
+    assert queue.next_due() == 1000.0 + jobqueue.BACKOFF_SECONDS
+    clock[0] += jobqueue.BACKOFF_SECONDS
+    job = queue.claim()
+    assert job['attempts'] == 2
+    queue.fail(job['id'], 'timeout: no result')
+    assert queue.counts()['failed'] == 1
+
+
+def test_recover_requeues_running_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / 'q.db'))
+    queue.enqueue(pdf(tmp_path / 'a.pdf', 1), 'scripts.script_sbi')
+    queue.claim()
+    assert queue.recover() == 1
+    assert queue.counts()['pending'] == 1
+
+
+class Pool:
+    """Fails each PDF's first attempt, like a job killed at its deadline"""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, module_name, pdf_path, poppler_bin=None, **kwargs):
+        self.calls.append(pdf_path)
+        if self.calls.count(pdf_path) == 1:
+            return {'ok': False, 'error': 'timeout', 'message': 'no result'}
+        return {'ok': True, 'metrics': (1, 2, 3, 4), 'elapsed': 0.1}
+
+
+def test_drain_retries_until_done(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobqueue, 'BACKOFF_SECONDS', 0.01)
+    queue = JobQueue(str(tmp_path / 'q.db'))
+    queue.enqueue(pdf(tmp_path / 'a.pdf', 1), 'scripts.script_sbi')
+    pool = Pool()
+    assert jobqueue.drain(queue, pool) == {'pending': 0, 'running': 0, 'done': 1, 'failed': 0}
+    assert len(pool.calls) == 2
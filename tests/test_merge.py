@@ -0,0 +1,37 @@
+import pandas as pd
+from scripts.merge import merge_statement
+from scripts.store import TransactionStore
+
+
+def statement(start, end, offset=0.0):
+    """Daily credits of 10 from Jan 1st on, with the running balance they give"""
+    days = pd.date_range('2024-01-01', '2024-04-30', freq='D')
+    full = pd.DataFrame({'date': days.strftime('%d/%m/%Y'), 'narration': 'UPI/INTEREST',
+                         'debit': 0.0, 'credit': 10.0, 'balance': 1000.0 + 10.0 * (pd.RangeIndex(len(days)) + 1)})
+    part = full[(days >= start) & (days <= end)].copy()
+    part['balance'] += offset
+    return part
+
+
+def test_overlapping_statement_adds_only_new_rows(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        first = merge_statement(store, 'sbi', '1', statement('2024-01-01', '2024-03-31'))
+        assert first['added'] == 91 and first['duplicates'] == 0
+        second = merge_statement(store, 'sbi', '1', statement('2024-02-01', '2024-04-30'))
+        assert second['added'] == 30 and second['duplicates'] == 60
+        assert [seam['ok'] for seam in second['seams']] == [True]
+        again = merge_statement(store, 'sbi', '1', statement('2024-02-01', '2024-04-30'))
+        assert again['added'] == 0 and again['statement_id'] is None
+        assert len(store.query(account='1')) == 121
+        # Another account keeps its own history
+        assert merge_statement(store, 'sbi', '2', statement('2024-01-01', '2024-01-31'))['added'] == 31
+
+
+def test_seam_break_is_reported(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        merge_statement(store, 'sbi', '1', statement('2024-01-01', '2024-01-31'))
+        merge_statement(store, 'sbi', '1', statement('2024-03-01', '2024-03-31'))
+        gap = merge_statement(store, 'sbi', '1', statement('2024-02-01', '2024-02-29', offset=50.0))
+    start, end = gap['seams']
+    assert start['seam'] == 'start' and not start['ok'] and start['found'] - start['expected'] == 50.0
+    assert end['seam'] == 'end' and not end['ok']
@@ -0,0 +1,39 @@
+import pandas as pd
+from scripts import narration
+
+
+def parsed(text, amount=None):
+    out = narration.parse(pd.Series([text]), None if amount is None else [amount])
+    return {field: (None if pd.isna(value) else value) for field, value in out.iloc[0].items()}
+
+
+def test_upi_layouts():
+    assert parsed('UPI/DR/412345678901/RAVI KUMAR/HDFC/ravi@okhdfc/lunch') == {
+        'channel': 'UPI', 'direction': 'debit', 'counterparty': 'RAVI KUMAR',
+        'counterparty_bank': 'HDFC', 'reference': '412345678901'}
+    upi = parsed('UPI-AMAZON PAY-amazon@apl-UTIB0000100-412345678902-ORDER', 1.0)
+    assert (upi['counterparty'], upi['counterparty_bank'], upi['reference']) == ('AMAZON PAY', 'UTIB', '412345678902')
+    # Only a handle: its local part stands in for the name
+    assert parsed('UPI 412345678904 merchant@ybl')['counterparty'] == 'MERCHANT'
+
+
+def test_transfers_mandates_and_cheques():
+    neft = parsed('NEFT CR-HDFC0001234-ACME PVT LTD-SALARY-N123456789')
+    assert neft == {'channel': 'NEFT', 'direction': 'credit', 'counterparty': 'ACME PVT LTD',
+                    'counterparty_bank': 'HDFC', 'reference': 'N123456789'}
+    imps = parsed('BY TRANSFER-IMPS/P2A/412345678903/JOHN/SBI')
+    assert (imps['channel'], imps['direction'], imps['counterparty']) == ('IMPS', 'credit', 'JOHN')
+    nach = parsed('ACH D- BAJAJ FINANCE LTD-ABC12345')
+    assert (nach['channel'], nach['direction'], nach['counterparty'], nach['reference']) == (
+        'NACH', 'debit', 'BAJAJ FINANCE LTD', 'ABC12345')
+    cheque = parsed('CHQ DEP 123456 CLEARING')
+    assert (cheque['channel'], cheque['direction'], cheque['reference']) == ('CHEQUE', 'credit', '123456')
+
+
+def test_direction_falls_back_to_channel_then_amount():
+    assert parsed('ATM WDL 1234 MUMBAI')['direction'] == 'debit'
+    assert parsed('INT.CR')['channel'] == 'INTEREST'
+    assert parsed('misc charges', -5.0) == {'channel': 'OTHER', 'direction': 'debit', 'counterparty': None,
+                                            'counterparty_bank': None, 'reference': None}
+    assert parsed('cash deposit at branch')['channel'] == 'CASH'
+    assert parsed(None)['direction'] is None
@@ -0,0 +1,38 @@
+import fitz
+from scripts import ocr
+
+
+def word(text, x0, y0, width=30, height=10):
+    return {'text': text, 'x0': x0, 'y0': y0, 'x1': x0 + width, 'y1': y0 + height}
+
+
+def test_words_group_into_aligned_rows():
+    words = [
+        word('Date', 10, 10), word('Narration', 100, 11), word('Balance', 300, 9),
+        word('01/01/2024', 10, 30), word('UPI', 100, 31), word('SHOP', 135, 30), word('900.00', 300, 30),
+        # No narration on this line: the amount still lands under Balance
+        word('02/01/2024', 10, 50), word('1,000.00', 302, 51),
+    ]
+    assert ocr.words_to_rows(words) == [
+        ['Date', 'Narration', 'Balance'],
+        ['01/01/2024', 'UPI SHOP', '900.00'],
+        ['02/01/2024', None, '1,000.00'],
+    ]
+    assert ocr.rows_to_text(ocr.words_to_rows(words)[1:2]) == "01/01/2024\nUPI SHOP\n900.00"
+    assert ocr.words_to_rows([]) == []
+
+
+def test_only_pages_without_text_are_scanned(tmp_path):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 72), "Statement of account " * 5)
+    doc.new_page()
+    assert ocr.scanned_pages(doc) == [1]
+    doc.close()
+
+
+def test_render_resolution_tracks_page_width():
+    doc = fitz.open()
+    a4 = doc.new_page(width=595, height=842)
+    assert 290 <= ocr.adaptive_dpi(a4) <= 310
+    assert ocr.adaptive_dpi(doc.new_page(width=5000, height=500)) == ocr.MIN_DPI
+    doc.close()
@@ -0,0 +1,41 @@
+import fitz
+from scripts import extraction
+
+
+def statement(path, pages=2):
+    doc = fitz.open()
+    x = [40, 110, 300, 380, 460, 540]
+    for page_no in range(pages):
+        page = doc.new_page()
+        rows = [['Date', 'Narration', 'Debit', 'Credit', 'Balance', '']]
+        rows += [[f'{day:02d}/01/2024', f'UPI/{page_no}/{day}', f'{day}.00', '', f'{1000 - day}.00', '']
+                 for day in range(1, 11)]
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                page.insert_text((x[j] + 2, 72 + 18 * i), cell, fontsize=8)
+        for i in range(len(rows) + 1):
+            page.draw_line((x[0], 60 + 18 * i), (x[-1], 60 + 18 * i))
+        for xx in x:
+            page.draw_line((xx, 60), (xx, 60 + 18 * len(rows)))
+    doc.save(path)
+    doc.close()
+
+
+def test_cached_pages_are_shared_across_markers(tmp_path, monkeypatch):
+    pdf = str(tmp_path / 'a.pdf')
+    statement(pdf)
+    calls = []
+    page_tables = extraction.page_tables
+    monkeypatch.setattr(extraction, 'page_tables', lambda page, strategy: calls.append(page.number)
+                        or page_tables(page, strategy))
+    db = str(tmp_path / 'pages.db')
+
+    first = extraction.extract_tables(pdf, ('date',), (), 'tables', page_cache=db)
+    assert calls == [0, 1]
+    # Another bank's markers select the same pages: nothing is detected again
+    second = extraction.extract_tables(pdf, ('narration',), ('closing balance',), 'tables', page_cache=db)
+    assert calls == [0, 1]
+    assert second.equals(first)
+    # A different strategy is a different extraction
+    extraction.extract_tables(pdf, ('date',), (), 'text', page_cache=db)
+    assert calls == [0, 1, 0, 1]
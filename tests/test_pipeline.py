@@ -0,0 +1,59 @@
+import importlib
+import linecache
+import sys
+import pandas as pd
+from scripts import pipeline
+
+BANK = '''
+import pandas as pd
+
+START_MARKERS = ('date',)
+CALLS = []
+
+
+def extract_all_tables(pdf_path, route=None, checkpoint_dir=None):
+    CALLS.append('extract')
+    return pd.DataFrame({{'date': ['01/01/2024'], 'amount': ['{amount}']}})
+
+
+def parse(raw, pdf_path):
+    CALLS.append('parse')
+    return raw.assign(amount=raw['amount'].astype(float) * {scale}), (1.0, 2.0, 3.0, 4.0)
+'''
+
+
+def bank(tmp_path, monkeypatch, amount='10.00', scale=1):
+    (tmp_path / 'fake_bank.py').write_text(BANK.format(amount=amount, scale=scale))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Rewrites within the same second must not be served from a stale .pyc
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+    linecache.checkcache()
+    module = importlib.reload(importlib.import_module('fake_bank'))
+    pipeline.stage_versions.cache_clear()
+    return module
+
+
+def test_stages_rerun_only_when_their_code_changes(tmp_path, monkeypatch):
+    pdf = tmp_path / 'a.pdf'
+    pdf.write_bytes(b'%PDF-1.4')
+    stages = str(tmp_path / 'stages')
+
+    module = bank(tmp_path, monkeypatch)
+    df, metrics, ran = pipeline.run_staged('fake_bank', str(pdf), stage_dir=stages)
+    assert ran == ['extract', 'parse'] and df['amount'].tolist() == [10.0]
+
+    # Same code, same PDF: both stages come from disk
+    df, metrics, ran = pipeline.run_staged('fake_bank', str(pdf), stage_dir=stages)
+    assert ran == [] and module.CALLS == ['extract', 'parse']
+    assert metrics == (1.0, 2.0, 3.0, 4.0) and df['amount'].tolist() == [10.0]
+
+    # A parse fix re-runs parse from the stored raw table
+    module = bank(tmp_path, monkeypatch, scale=2)
+    df, _, ran = pipeline.run_staged('fake_bank', str(pdf), stage_dir=stages)
+    assert ran == ['parse'] and module.CALLS == ['parse'] and df['amount'].tolist() == [20.0]
+
+    # A new PyMuPDF re-runs extract; the same raw table leaves the parse output valid
+    monkeypatch.setattr(pipeline.fitz, 'VersionBind', 'next')
+    pipeline.stage_versions.cache_clear()
+    _, _, ran = pipeline.run_staged('fake_bank', str(pdf), stage_dir=stages)
+    assert ran == ['extract'] and module.CALLS == ['parse', 'extract']
@@ -0,0 +1,35 @@
+import pandas as pd
+from scripts import reconcile
+from scripts.normalize import canonical
+
+
+def statement(debit, credit, balance):
+    n = len(balance)
+    return pd.DataFrame({'date': [f'{d + 1:02d}/01/2024' for d in range(n)], 'narration': ['X'] * n,
+                         'debit': debit, 'credit': credit, 'balance': balance})
+
+
+def test_integrity_score_and_break_positions():
+    txns = canonical(statement(['', '100.00', '50.00', ''], ['1,000.00', '', '', '20.00'],
+                               ['1,500.00', '1,400.00', '1,300.00', '1,320.00']))
+    report = reconcile.check(txns)
+    assert report['checked'] == 3 and report['broken'] == [2]
+    assert report['score'] == 2 / 3 and report['opening'] == 500.0
+    # Checked from the printed opening balance, the first row counts too
+    assert reconcile.check(txns, opening=400.0)['broken'] == [0, 2]
+
+
+def test_rows_without_a_balance_are_checked_with_the_next_one():
+    txns = canonical(statement(['100.00', '50.00', ''], ['', '', '25.00'], ['', '850.00', '875.00']))
+    report = reconcile.check(txns, opening=1000.0)
+    assert report['checked'] == 2 and report['broken'] == []
+
+
+def test_fix_sides_moves_amounts_the_balance_contradicts():
+    df = statement(['', '100.00', '', '30.00'], ['200.00', '', '40.00', ''],
+                   ['1,200.00', '1,300.00', '1,260.00', '1,230.00'])
+    fixed = reconcile.fix_sides(df, 'debit', 'credit', 'balance')
+    assert fixed['debit'].tolist() == ['', '', '40.00', '30.00']
+    assert fixed['credit'].tolist() == ['200.00', '100.00', '', '']
+    # The frame passed in is left as it was
+    assert df['debit'].tolist() == ['', '100.00', '', '30.00']
@@ -0,0 +1,41 @@
+import pandas as pd
+from scripts import recurring
+
+
+def txns(rows):
+    frame = pd.DataFrame(rows, columns=['date', 'narration', 'debit', 'credit'])
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+
+def monthly(day, narration, debit=0.0, credit=0.0, months=6, jitter=0.0):
+    return [(f'2024-{m:02d}-{day:02d}', narration, debit * (1 + jitter * (m % 2)), credit)
+            for m in range(1, months + 1)]
+
+
+def test_salary_emi_sip_and_rent():
+    rows = (monthly(1, 'NEFT CR-HDFC0001234-ACME PVT LTD-SALARY-N1', credit=50000.0)
+            + monthly(5, 'ACH D- BAJAJ FINANCE LTD-ABC12345', debit=12000.0)
+            + monthly(10, 'SIP HDFC MUTUAL FUND', debit=5000.0, jitter=0.05)
+            + monthly(3, 'UPI/DR/412345678901/LANDLORD SHARMA/HDFC/x@ok/RENT', debit=20000.0)
+            + [('2024-02-14', 'POS AMAZON', 999.0, 0.0), ('2024-04-20', 'POS AMAZON', 2499.0, 0.0)])
+    found = recurring.detect(txns(rows)).set_index('kind')
+    assert sorted(found.index) == ['emi', 'rent', 'salary', 'sip']
+    assert (found['period'] == 'monthly').all() and (found['count'] == 6).all()
+    assert found.loc['salary', 'direction'] == 'credit'
+    assert found.loc['emi', 'next_expected'] == pd.Timestamp('2024-07-06')  # last + median gap of 31 days
+
+
+def test_irregular_or_rare_payments_are_not_series():
+    rows = ([(d, 'UPI/DR/412345678901/CAFE/HDFC/cafe@ok/x', 250.0, 0.0)
+             for d in ('2024-01-03', '2024-01-04', '2024-02-20', '2024-04-01')]
+            + monthly(5, 'ACH D- HOME LOAN-REF12345', debit=9000.0, months=2))
+    assert recurring.detect(txns(rows)).empty
+
+
+def test_bounces_and_their_charges():
+    frame = txns([('2024-01-05', 'ACH D- BAJAJ FINANCE LTD-ABC12345', 12000.0, 0.0),
+                  ('2024-01-05', 'ACH RETURN BAJAJ FINANCE INSUFFICIENT FUNDS', 0.0, 12000.0),
+                  ('2024-01-06', 'ACH RTN CHRG INCL GST', 590.0, 0.0),
+                  ('2024-01-07', 'UPI/DR/412345678901/SHOP/HDFC/s@ok/x', 100.0, 0.0)])
+    assert recurring.flag_bounces(frame).fillna('').tolist() == ['', 'return', 'charge', '']
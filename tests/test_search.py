@@ -0,0 +1,33 @@
+import pandas as pd
+from scripts.store import TransactionStore
+
+
+def frame(narrations, date='01/04/2024'):
+    return pd.DataFrame({'date': date, 'narration': narrations, 'debit': '100.00', 'credit': '',
+                         'balance': ''})
+
+
+def test_substring_search(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        assert store.indexed
+        store.add_statement('sbi', '1', frame(['UPI/DR/412345678901/RAVI/HDFC/ravi.k@okhdfc',
+                                               'CHQ PAID 004512 BAJAJ FINANCE', 'ATM WDL']))
+        store.add_statement('sbi', '2', frame(['NACH-DR-BAJAJ FIN-REF1'], date='01/05/2024'))
+        assert store.search('okhdfc')['account'].tolist() == ['1']
+        assert store.search('bajaj fin')['narration'].tolist() == ['CHQ PAID 004512 BAJAJ FINANCE',
+                                                                   'NACH-DR-BAJAJ FIN-REF1']
+        assert store.search('bajaj', account='2')['account'].tolist() == ['2']
+        assert store.search('4512')['narration'].tolist() == ['CHQ PAID 004512 BAJAJ FINANCE']
+        # Shorter than a trigram: answered by a scan instead of the index
+        assert len(store.search('WD')) == 1
+        assert store.search('50%').empty
+
+
+def test_index_backfills_rows_stored_before_it(tmp_path):
+    path = str(tmp_path / 's.db')
+    with TransactionStore(path) as store:
+        store.add_statement('sbi', '1', frame(['IMPS/P2A/JOHN']))
+        store.conn.execute("DROP TABLE narration_index")
+        store.conn.commit()
+    with TransactionStore(path) as store:
+        assert store.search('john')['narration'].tolist() == ['IMPS/P2A/JOHN']
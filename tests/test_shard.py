@@ -0,0 +1,50 @@
+import json
+import os
+import time
+from scripts import shard
+from scripts.shard import Lease
+
+
+def leases(tmp_path):
+    os.makedirs(tmp_path / 'leases', exist_ok=True)
+    return str(tmp_path)
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    root = leases(tmp_path)
+    dead = Lease(root, '00000', 'host-a', lease_seconds=0.3)
+    assert dead.acquire()
+    # host-a dies: no more heartbeats
+    dead._stop.set()
+    dead._thread.join()
+    other = Lease(root, '00000', 'host-b', lease_seconds=0.3)
+    assert not other.acquire()
+    time.sleep(0.4)
+    assert other.acquire()
+    assert other.held() and not dead.held()
+    other.release()
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    root = leases(tmp_path)
+    live = Lease(root, '00000', 'host-a', lease_seconds=0.3)
+    assert live.acquire()
+    time.sleep(0.6)
+    assert not Lease(root, '00000', 'host-b', lease_seconds=0.3).acquire()
+    assert live.held()
+    live.release()
+    assert not os.listdir(tmp_path / 'leases')
+
+
+def test_work_finishes_every_shard_once(tmp_path):
+    pdfs = []
+    for i in range(3):
+        path = tmp_path / f's{i}.pdf'
+        path.write_bytes(b'%PDF-1.4')
+        pdfs.append(str(path))
+    root = str(tmp_path / 'batch')
+    assert shard.plan(root, pdfs, 'worker_jobs', shard_size=2) == 2
+    assert shard.work(root, owner='host-a') == 2
+    assert shard.work(root, owner='host-b') == 0
+    with open(os.path.join(root, 'output', 'shard=00001', 'metrics.json')) as f:
+        assert [r['ok'] for r in json.load(f)] == [True]
@@ -0,0 +1,37 @@
+import os
+import sys
+import pytest
+from scripts import workers
+from scripts.workers import WorkerPool
+
+pa = pytest.importorskip('pyarrow')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from benchmarks.bench_ipc import make_frame  # noqa: E402
+
+
+def published():
+    return {name for name in os.listdir(workers.SHARED_DIR) if name.startswith('pdfparser-')}
+
+
+def test_publish_attach_round_trip(tmp_path):
+    df = make_frame(workers.SHARED_MIN_ROWS)
+    descriptor = workers.publish(df, directory=str(tmp_path))
+    assert descriptor['rows'] == len(df) and os.path.exists(descriptor['path'])
+    assert workers.attach(descriptor).equals(df)
+    # Mapped, then unlinked straight away
+    assert os.listdir(tmp_path) == []
+
+
+def test_small_or_untypable_frames_are_pickled():
+    assert workers.publish(make_frame(10)) is None
+    mixed = make_frame(workers.SHARED_MIN_ROWS).astype(object)
+    mixed.iloc[0, 0] = 1.5
+    assert workers.publish(mixed) is None
+
+
+def test_large_results_come_back_through_shared_memory():
+    before = published()
+    with WorkerPool(size=1, timeout=30) as pool:
+        result = pool.run('benchmarks.bench_ipc', '', rows=5000)
+    assert result['ok'] and len(result['df']) == 5000
+    assert published() <= before
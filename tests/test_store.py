@@ -0,0 +1,34 @@
+import pandas as pd
+from scripts.store import TransactionStore, financial_year
+
+
+def statement(dates, narrations, amounts):
+    balance = 1000 + pd.Series(amounts).cumsum()
+    return pd.DataFrame({
+        'date': dates, 'narration': narrations,
+        'debit': [f'{-a:.2f}' if a < 0 else '' for a in amounts],
+        'credit': [f'{a:.2f}' if a > 0 else '' for a in amounts],
+        'balance': balance.map('{:.2f}'.format),
+    })
+
+
+def test_financial_year_bounds():
+    assert financial_year(24) == ('2023-04-01', '2024-03-31')
+    assert financial_year('2025') == ('2024-04-01', '2025-03-31')
+
+
+def test_query_filters(tmp_path):
+    with TransactionStore(str(tmp_path / 's.db')) as store:
+        store.add_statement('sbi', '1', statement(['30/03/2024', '02/04/2024', '15/04/2024'],
+                                                  ['SALARY', 'RENT', 'UPI/SHOP'], [5000.0, -2000.0, -150.0]),
+                            metrics=(2150.0, 5000.0, 1000.0, 3850.0), source='a.pdf')
+        store.add_statement('hdfc', '2', statement(['01/04/2024'], ['SALARY'], [7000.0]))
+        assert len(store.query()) == 4
+        assert store.query(account='1', fy=25)['narration'].tolist() == ['RENT', 'UPI/SHOP']
+        assert store.query(max_amount=-1000)['narration'].tolist() == ['RENT']
+        assert store.query(bank='hdfc', columns=['date', 'amount']).to_dict('records') == [
+            {'date': '2024-04-01', 'amount': 7000.0}]
+        chunks = list(store.query(account='1', chunksize=2))
+        assert [len(c) for c in chunks] == [2, 1]
+        stored = store.statements('1').iloc[0]
+        assert (stored['rows'], stored['total_debit'], stored['closing_bal']) == (3, 2150.0, 3850.0)
@@ -0,0 +1,31 @@
+import fitz
+from scripts import summary
+
+
+def pdf(path, *pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((50, 72), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_printed_totals_are_read_when_they_reconcile(tmp_path):
+    path = pdf(tmp_path / 'a.pdf', "Opening Balance : 1,000.00", "rows...",
+               "Total Debits : 400.00\nTotal Credits : 900.00\nClosing Balance : 1,500.00")
+    assert summary.find_summary(path) == {'opening': 1000.0, 'debits': 400.0, 'credits': 900.0, 'closing': 1500.0}
+
+
+def test_totals_that_do_not_add_up_are_refused(tmp_path):
+    path = pdf(tmp_path / 'a.pdf', "Opening Balance : 1,000.00\nTotal Debits : 400.00\n"
+                                   "Total Credits : 900.00\nClosing Balance : 9,999.00")
+    assert summary.find_summary(path) is None
+
+
+def test_labels_then_values_block():
+    text = "STATEMENT SUMMARY\nOpening Balance Dr Count Cr Count Debits Credits Closing Bal\n" \
+           "1,000.00 3 2 400.00 900.00 1,500.00"
+    labels = ('opening', None, None, 'debits', 'credits', 'closing')
+    assert summary.match_block(text, 'Closing Bal', labels) == {
+        'opening': 1000.0, 'debits': 400.0, 'credits': 900.0, 'closing': 1500.0}
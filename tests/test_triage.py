@@ -0,0 +1,29 @@
+import fitz
+from scripts import triage
+
+
+def page_with(draw):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "01/01/2024 SALARY 1,000.00 " * 5)
+    draw(page)
+    return doc, page
+
+
+def test_filled_boxes_are_not_rules():
+    def boxes(page):
+        page.draw_rect(fitz.Rect(50, 100, 250, 160), color=None, fill=(0.9, 0.9, 0.9))
+        page.draw_rect(fitz.Rect(300, 100, 500, 160), color=None, fill=(0.9, 0.9, 0.9))
+    doc, page = page_with(boxes)
+    assert triage.count_rules(page) < triage.MIN_RULES_PER_PAGE
+    doc.close()
+
+
+def test_ruled_grid_counts():
+    def grid(page):
+        for y in range(100, 260, 20):
+            page.draw_line((50, y), (500, y))
+        page.draw_rect(fitz.Rect(50, 300, 500, 301), color=None, fill=(0, 0, 0))
+    doc, page = page_with(grid)
+    assert triage.count_rules(page) == 9
+    doc.close()
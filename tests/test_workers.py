@@ -0,0 +1,47 @@
+import os
+import sys
+import pytest
+from scripts.workers import WorkerPool
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF-1.4 not really')
+    return str(path)
+
+
+def test_killed_job_resumes_from_checkpoint(tmp_path, pdf):
+    checkpoints = tmp_path / 'cp'
+    with WorkerPool(size=1, timeout=3, checkpoint_dir=str(checkpoints)) as pool:
+        assert pool.run('worker_jobs', pdf, mode='resume')['error'] == 'timeout'
+        assert os.listdir(checkpoints)
+        result = pool.run('worker_jobs', pdf, mode='resume')
+    assert result['ok'] and result['metrics'][0] == 1.0
+    # Cleared once the job went through
+    assert os.listdir(checkpoints) == []
+
+
+def test_results_for_timeout_memory_crash_and_error(pdf):
+    with WorkerPool(size=1, timeout=3, max_rss_mb=300) as pool:
+        ok = pool.run('worker_jobs', pdf)
+        assert ok['ok'] and ok['metrics'] == (1.0, 2.0, 3.0, 4.0) and ok['error'] is None
+        first = next(iter(pool.idle.queue))
+        assert pool.run('worker_jobs', pdf, mode='hang')['error'] == 'timeout'
+        memory = pool.run('worker_jobs', pdf, mode='memory')
+        assert memory['error'] == 'memory' and not memory['ok']
+        assert pool.run('worker_jobs', pdf, mode='crash')['error'] == 'crashed'
+        error = pool.run('worker_jobs', pdf, mode='error')
+        assert error['error'] == 'exception' and 'bad statement' in error['message']
+        # Failed workers were replaced, and the replacement still serves jobs
+        assert next(iter(pool.idle.queue)) is not first
+        assert first.process.exitcode is not None
+        assert pool.run('worker_jobs', pdf)['ok']
+
+
+def test_call_runs_a_function_in_a_worker(pdf):
+    with WorkerPool(size=1, timeout=10) as pool:
+        result = pool.call(os.path.getsize, pdf)
+    assert result['ok'] and result['value'] == os.path.getsize(pdf)
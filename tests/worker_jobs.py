@@ -0,0 +1,28 @@
+"""Stand-in parser modules for the WorkerPool tests; workers import them by name"""
+import os
+import time
+from scripts.extraction import Checkpoint
+
+
+def run(pdf_path, poppler_bin=None, mode='full', checkpoint_dir=None):
+    checkpoint = Checkpoint(checkpoint_dir, pdf_path, 'worker_jobs')
+    try:
+        if mode == 'resume':
+            # One page done, then stuck until the deadline kills us
+            if 0 not in checkpoint.pages:
+                checkpoint.save(0, 'page 0')
+                time.sleep(60)
+            return None, (float(len(checkpoint.pages)), 0.0, 0.0, 0.0)
+    finally:
+        checkpoint.close()
+    if mode == 'hang':
+        time.sleep(60)
+    elif mode == 'crash':
+        os._exit(3)
+    elif mode == 'memory':
+        ballast = bytearray(400 * 1024 * 1024)
+        ballast[::4096] = b'x' * len(ballast[::4096])
+        time.sleep(60)
+    elif mode == 'error':
+        raise ValueError("bad statement")
+    return None, (1.0, 2.0, 3.0, 4.0)